@@ -0,0 +1,151 @@
+"""Compare the caves of the diffusion-limited aggregation generators with a sequential walk.
+
+Run from the repository root:
+
+    python -m benchmarks.dla_shape --seeds 20 --walkers 64 256
+
+The generators advance many walkers at once.  For fixed seeds this measures the
+shape of their caves next to those of a reference which walks one walker at a
+time, like the generators originally did: the share of floor tiles with a single
+floor neighbor (branch tips), the mean number of floor neighbors, the mean
+distance from the middle relative to the map size and the share of the map
+covered by the bounding box of the cave.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Type
+
+import numpy as np  # type: ignore
+
+from dungeon.diffusion_limited_aggregation import DiffusionLimitedAggregation
+from dungeon.diffusion_limited_aggregation_2 import DiffusionLimitedAggregation2
+from dungeon.diffusion_limited_aggregation_base import DiffusionLimitedAggregationBase
+from engine import Engine
+import entity_factories
+
+
+def _create_generator(
+        generator_class: Type[DiffusionLimitedAggregationBase],
+        width: int,
+        height: int,
+        seed: int,
+        walkers: Optional[int]
+) -> DiffusionLimitedAggregationBase:
+    return generator_class(
+        map_width=width,
+        map_height=height,
+        walkers=walkers,
+        engine=Engine(player=entity_factories.player.clone()),
+        rng=random.Random(seed)
+    )
+
+
+def _walk_sequentially(generator: DiffusionLimitedAggregationBase) -> np.ndarray:
+    """Return the particles of the generator grown by one walker at a time, in pure Python."""
+    width, height = generator.map_width, generator.map_height
+    particles = generator._create_seed()
+    particle_count = int(np.count_nonzero(particles))
+    target_count = width * height * generator.floor_tile_rate
+    # The walkers are spawned the way the generator spawns them, one at a time.
+    rng = np.random.default_rng(generator.rng.getrandbits(64))
+
+    while particle_count < target_count:
+        (x,), (y,) = generator._spawn_walkers(1, rng)
+        x, y = int(x), int(y)
+        target_x, target_y = x, y
+
+        for _ in range(generator.max_steps):
+            if particles[x + 1, y] or particles[x - 1, y] or particles[x, y + 1] or particles[x, y - 1]:
+                if not particles[x, y]:
+                    particles[x, y] = True
+                    particle_count += 1
+                break
+
+            if 0 < target_x < width - 1 and 0 < target_y < height - 1:
+                x, y = target_x, target_y
+
+            direction_x, direction_y = generator._get_random_direction()
+            target_x, target_y = x + direction_x, y + direction_y
+
+    return particles
+
+
+def _measure_shape(particles: np.ndarray) -> Dict[str, float]:
+    width, height = particles.shape
+    padded = np.pad(particles, 1)
+    neighbors = (
+        padded[2:, 1:-1].astype(int) + padded[:-2, 1:-1] + padded[1:-1, 2:] + padded[1:-1, :-2]
+    )[particles]
+    x, y = np.nonzero(particles)
+
+    return dict(
+        tips=float(np.mean(neighbors == 1)),
+        neighbors=float(np.mean(neighbors)),
+        spread=float(np.mean(np.hypot((x - width / 2) / width, (y - height / 2) / height))),
+        bbox=float((np.ptp(x) + 1) * (np.ptp(y) + 1) / (width * height)),
+    )
+
+
+def _report(
+        label: str,
+        create_particles: Callable[[int], np.ndarray],
+        seeds: int
+) -> None:
+    start = time.perf_counter()
+    shapes = [_measure_shape(create_particles(seed)) for seed in range(seeds)]
+    milliseconds = (time.perf_counter() - start) / seeds * 1000
+
+    print(
+        f"  {label:<14}"
+        + "".join(
+            f"{statistics.mean(shape[key] for shape in shapes):>10.3f}"
+            f" ±{statistics.stdev(shape[key] for shape in shapes):.3f}"
+            for key in shapes[0]
+        )
+        + f"{milliseconds:>10.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=80)
+    parser.add_argument("--height", type=int, default=43)
+    parser.add_argument("--seeds", type=int, default=20, help="Number of seeds, from 0.")
+    parser.add_argument(
+        "--walkers", nargs="*", type=int, default=[],
+        help="Batch sizes to measure besides the default one.",
+    )
+    args = parser.parse_args()
+
+    generator_classes: List[Type[DiffusionLimitedAggregationBase]] = [
+        DiffusionLimitedAggregation, DiffusionLimitedAggregation2
+    ]
+    print(
+        f"  {'walkers':<14}{'tips':>16}{'neighbors':>16}{'spread':>16}{'bbox':>16}{'ms':>10}"
+    )
+    for generator_class in generator_classes:
+        print(generator_class.__name__)
+
+        def create(walkers: Optional[int]) -> Callable[[int], np.ndarray]:
+            return lambda seed: _create_generator(
+                generator_class, args.width, args.height, seed, walkers
+            )._create_particles()
+
+        _report(
+            "sequential",
+            lambda seed: _walk_sequentially(
+                _create_generator(generator_class, args.width, args.height, seed, None)
+            ),
+            args.seeds,
+        )
+        _report("default", create(None), args.seeds)
+        for walkers in args.walkers:
+            _report(str(walkers), create(walkers), args.seeds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Measure every dungeon generator over fixed seeds and a range of map sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.dungeon_generators --sizes 80x43 500x500 --seeds 3 --json results.json
+
+For every generator, map size and seed this records the wall time, the peak memory
+traced by tracemalloc, the number of floor tiles and the share of them reachable
+from the player.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+import numpy as np  # type: ignore
+import tcod
+
+from dungeon.base_dungeon_generator import BaseDungeonGenerator
+from engine import Engine
+import entity_factories
+from game_map import GameMap, GameWorld
+import procgen
+
+MAX_ROOMS = 30
+ROOM_MIN_SIZE = 6
+ROOM_MAX_SIZE = 10
+
+
+def _parse_size(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def _create_generator(
+        name: str, width: int, height: int, seed: int, floor: int
+) -> BaseDungeonGenerator:
+    """Return the named generator for a fresh engine on the given floor."""
+    engine = Engine(player=entity_factories.player.clone())
+    engine.game_world = GameWorld(
+        engine=engine,
+        map_width=width,
+        map_height=height,
+        max_rooms=MAX_ROOMS,
+        room_min_size=ROOM_MIN_SIZE,
+        room_max_size=ROOM_MAX_SIZE,
+        current_floor=floor,
+        seed=seed,
+        pregenerate=False
+    )
+
+    # Without an iteration budget, unlike procgen.generate_dungeon, so slow runs are measured in full.
+    return procgen.create_generator(
+        name,
+        max_rooms=MAX_ROOMS,
+        room_min_size=ROOM_MIN_SIZE,
+        room_max_size=ROOM_MAX_SIZE,
+        map_width=width,
+        map_height=height,
+        engine=engine,
+        rng=random.Random(f"{seed}/{floor}")
+    )
+
+
+def _get_reachable_share(dungeon: GameMap) -> float:
+    """Return the share of the walkable tiles the player can reach."""
+    walkable = dungeon.tiles["walkable"]
+    player = dungeon.engine.player
+
+    distance = tcod.path.maxarray(walkable.shape, dtype=np.int32)
+    distance[player.x, player.y] = 0
+    tcod.path.dijkstra2d(distance, walkable.astype(np.int32), cardinal=1, diagonal=1)
+
+    reachable = distance != np.iinfo(np.int32).max
+    return float(np.count_nonzero(reachable)) / max(1, int(np.count_nonzero(walkable)))
+
+
+def _measure(name: str, width: int, height: int, seed: int, floor: int) -> Dict[str, Any]:
+    """Generate one dungeon twice, once for the time and once for the peak memory."""
+    generator = _create_generator(name, width, height, seed, floor)
+    start = time.perf_counter()
+    dungeon = generator.generate_dungeon()
+    seconds = time.perf_counter() - start
+
+    # Tracing allocations slows generation down, so memory is measured in a second run.
+    generator = _create_generator(name, width, height, seed, floor)
+    tracemalloc.start()
+    try:
+        generator.generate_dungeon()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    downstairs_x, downstairs_y = dungeon.downstairs_location
+    return dict(
+        generator=name,
+        width=width,
+        height=height,
+        seed=seed,
+        floor=floor,
+        seconds=seconds,
+        peak_bytes=peak_bytes,
+        floor_tiles=int(np.count_nonzero(dungeon.tiles["walkable"])),
+        entities=len(dungeon.entities),
+        reachable_share=_get_reachable_share(dungeon),
+        downstairs_walkable=bool(dungeon.tiles["walkable"][downstairs_x, downstairs_y]),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--generators",
+        nargs="+",
+        choices=list(procgen.generators),
+        default=list(procgen.generators),
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=_parse_size, default=[(80, 43), (200, 200), (500, 500)],
+        help="Map sizes as WIDTHxHEIGHT.",
+    )
+    parser.add_argument("--seeds", type=int, default=3, help="Number of seeds, from 0.")
+    parser.add_argument("--floor", type=int, default=1, help="Floor for the entity tables.")
+    parser.add_argument("--json", metavar="FILE", help="Also write all results to FILE.")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    print(
+        f"{'generator':<34}{'size':>10}{'ms':>10}{'peak KiB':>10}"
+        f"{'floor tiles':>12}{'reachable':>10}"
+    )
+    for name in args.generators:
+        for width, height in args.sizes:
+            runs = [_measure(name, width, height, seed, args.floor) for seed in range(args.seeds)]
+            results += runs
+
+            print(
+                f"{name:<34}{f'{width}x{height}':>10}"
+                f"{statistics.median(run['seconds'] for run in runs) * 1000:>10.1f}"
+                f"{max(run['peak_bytes'] for run in runs) / 1024:>10.0f}"
+                f"{statistics.mean(run['floor_tiles'] for run in runs):>12.0f}"
+                f"{min(run['reachable_share'] for run in runs):>10.1%}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                dict(
+                    python=platform.python_version(),
+                    numpy=np.__version__,
+                    tcod=tcod.__version__,
+                    machine=platform.machine(),
+                    results=results,
+                ),
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare save and load time and file size of the save formats.
+
+Run from the repository root:
+
+    python -m benchmarks.save_format --messages 20000
+"""
+from __future__ import annotations
+
+import argparse
+import lzma
+import pickle
+import random
+import time
+from typing import Callable, List, Tuple
+
+from engine import Engine
+import savegame
+import setup_game
+
+
+def _long_run(messages: int) -> Engine:
+    """Return a new game which looks like it has been played for a long time."""
+    engine = setup_game.new_game(pregenerate=False, seed=0)
+
+    for i in range(messages):
+        engine.message_log.add_message(
+            f"The Orc attacks Player for {random.randint(1, 9)} hit points. ({i})"
+        )
+    engine.game_map.explored[:] = True
+
+    return engine
+
+
+def _measure(function: Callable[[], object], repeat: int) -> float:
+    """Return the fastest time of `repeat` runs in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    engine = _long_run(args.messages)
+
+    legacy_data = lzma.compress(pickle.dumps(engine))
+    results: List[Tuple[str, float, float, int]] = [
+        (
+            "pickle+lzma (old)",
+            _measure(lambda: lzma.compress(pickle.dumps(engine)), args.repeat),
+            _measure(lambda: pickle.loads(lzma.decompress(legacy_data)), args.repeat),
+            len(legacy_data),
+        )
+    ]
+
+    for compressor, level in [("none", 0), ("zlib", 1), ("zlib", 6), ("zlib", 9), ("lzma", 6)]:
+        data = savegame.dumps(engine, compressor=compressor, level=level)
+        results.append(
+            (
+                f"{compressor} level {level}",
+                _measure(
+                    lambda: savegame.dumps(engine, compressor=compressor, level=level),
+                    args.repeat,
+                ),
+                _measure(lambda: savegame.loads(data), args.repeat),
+                len(data),
+            )
+        )
+
+    print(f"{'format':<20}{'save ms':>10}{'load ms':>10}{'bytes':>12}")
+    for name, save_ms, load_ms, size in results:
+        print(f"{name:<20}{save_ms:>10.1f}{load_ms:>10.1f}{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
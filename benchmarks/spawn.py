@@ -0,0 +1,66 @@
+"""Compare the spawn throughput of prototype clones and copy.deepcopy.
+
+Run from the repository root:
+
+    python -m benchmarks.spawn --count 2000
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import time
+from typing import Callable
+
+from engine import Engine
+from entity import Entity
+import entity_factories
+from game_map import GameMap
+
+
+def _deepcopy_spawn(prototype: Entity, gamemap: GameMap, x: int, y: int) -> Entity:
+    """Spawn the way Entity.spawn used to, by deep copying the prototype."""
+    clone = copy.deepcopy(prototype)
+    clone.x = x
+    clone.y = y
+    clone.parent = gamemap
+    gamemap.add_entity(clone)
+    return clone
+
+
+def _measure(
+        spawn: Callable[[Entity, GameMap, int, int], Entity],
+        prototype: Entity,
+        count: int,
+        repeat: int
+) -> float:
+    """Return the best number of spawns per second of `repeat` runs."""
+    engine = Engine(player=entity_factories.player.clone())
+
+    best = float("inf")
+    for _ in range(repeat):
+        gamemap = GameMap(engine, 80, 43)
+        start = time.perf_counter()
+        for i in range(count):
+            spawn(prototype, gamemap, i % 80, i // 80 % 43)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'prototype':<22}{'deepcopy/s':>12}{'clone/s':>12}{'speedup':>9}")
+    for name, prototype in entity_factories.prototypes.items():
+        deepcopy_rate = _measure(_deepcopy_spawn, prototype, args.count, args.repeat)
+        clone_rate = _measure(Entity.spawn, prototype, args.count, args.repeat)
+        print(
+            f"{name:<22}{deepcopy_rate:>12.0f}{clone_rate:>12.0f}"
+            f"{clone_rate / deepcopy_rate:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,7 @@
 from __future__ import annotations
 
-import random
 from typing import List, Optional, Tuple, TYPE_CHECKING
 
-import numpy as np  # type: ignore
 import tcod
 
 from actions import Action, BumpAction, MeleeAction, MovementAction, WaitAction
@@ -16,22 +14,27 @@ class BaseAI(Action):
     def perform(self) -> None:
         raise NotImplementedError()
 
+    def is_dormant(self) -> bool:
+        """
+        Return True if this AI will do nothing until the player can see its actor.
+
+        Dormant actors are skipped by the scheduler until the player sees them again.
+        """
+        return False
+
+    def clone(self, entity: Actor) -> BaseAI:
+        """Return a copy of this AI which controls `entity`."""
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.entity = entity
+        return clone
+
     def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         """Compute and return a path to the target position.
 
         If there is no valid path then returns an empty list.
         """
-        # Copy the walkable array.
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.gamemap.entities:
-            # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += 10
+        cost = self.entity.gamemap.get_movement_cost()
 
         # Create a graph from the cost array and pass that graph to a new pathfinder.
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
@@ -60,6 +63,13 @@ class ConfusedEnemy(BaseAI):
         self.previous_ai = previous_ai
         self.turns_remaining = turns_remaining
 
+    def clone(self, entity: Actor) -> ConfusedEnemy:
+        clone = super().clone(entity)
+        assert isinstance(clone, ConfusedEnemy)
+        if self.previous_ai:
+            clone.previous_ai = self.previous_ai.clone(entity)
+        return clone
+
     def perform(self) -> None:
         # Revert the AI back to the original state if the effect has run its course.
         if self.turns_remaining <= 0:
@@ -69,7 +79,7 @@ class ConfusedEnemy(BaseAI):
             self.entity.ai = self.previous_ai
         else:
             # Pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = self.engine.game_world.rng.choice(
                 [
                     (-1, -1),  # Northwest
                     (0, -1),  # North
@@ -94,6 +104,15 @@ class HostileEnemy(BaseAI):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
 
+    def clone(self, entity: Actor) -> HostileEnemy:
+        clone = super().clone(entity)
+        assert isinstance(clone, HostileEnemy)
+        clone.path = list(self.path)
+        return clone
+
+    def is_dormant(self) -> bool:
+        return not self.path and not self.engine.game_map.visible[self.entity.x, self.entity.y]
+
     def perform(self) -> None:
         target = self.engine.player
         dx = target.x - self.entity.x
@@ -104,7 +123,8 @@ class HostileEnemy(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            # All hostiles share the engine's per-turn pathfinder rooted at the player.
+            self.path = self.engine.get_path_to_player(self.entity.x, self.entity.y)
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
@@ -8,7 +8,6 @@ import components.ai
 import components.inventory
 from components.base_component import BaseComponent
 from exceptions import Impossible
-from helper.circle import is_in
 from input_handlers import (
     ActionOrHandler,
     AreaRangedAttackHandler,
@@ -100,6 +99,9 @@ class ConfusionConsumable(SingleTargetConsumable):
         target.ai = components.ai.ConfusedEnemy(
             entity=target, previous_ai=target.ai, turns_remaining=self.number_of_turns,
         )
+        # A confused actor stumbles around even where the player cannot see it.
+        self.engine.game_map.scheduler.wake(target)
+        self.engine.game_map.mark_changed(target)
 
 
 class MagicMissileDamageConsumable(SingleTargetConsumable):
@@ -134,13 +136,11 @@ class AreaTargetConsumable(Consumable):
         if not self.engine.game_map.visible[target_xy]:
             raise Impossible("You cannot target an area that you cannot see.")
 
-        targets_hit = False
-        for target in self.engine.game_map.actors:
-            if is_in(center_xy=(target.x, target.y), radius=self.radius, target_xy=target_xy):
-                self.activate_internal(consumer, target)
-                targets_hit = True
+        targets = self.engine.game_map.get_actors_in_circle(*target_xy, self.radius)
+        for target in targets:
+            self.activate_internal(consumer, target)
 
-        if not targets_hit:
+        if not targets:
             raise Impossible("There are no targets in the radius.")
         self.consume()
 
@@ -166,16 +166,17 @@ class NearestTargetConsumable(Consumable):
 
     def activate(self, action: actions.ItemAction) -> None:
         consumer = action.entity
-        target = None
-        closest_distance = self.maximum_range + 0.5
-
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        # The consumer is in range of itself, so one more actor than needed is asked for.
+        target = next(
+            (
+                actor
+                for actor in self.parent.gamemap.get_actors_in_range(
+                    consumer.x, consumer.y, self.maximum_range, visible_only=True, count=2
+                )
+                if actor is not consumer
+            ),
+            None,
+        )
 
         if target:
             self.activate_internal(consumer, target)
@@ -4,7 +4,6 @@ from typing import TYPE_CHECKING
 
 import color
 from components.base_component import BaseComponent
-from render_order import RenderOrder
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -59,12 +58,8 @@ class Fighter(BaseComponent):
             death_message = f"{self.parent.name} is dead!"
             death_message_color = color.enemy_die
 
-        self.parent.char = "%"
-        self.parent.color = (191, 0, 0)
-        self.parent.blocks_movement = False
-        self.parent.ai = None
-        self.parent.name = f"remains of {self.parent.name}"
-        self.parent.render_order = RenderOrder.CORPSE
+        self.parent.become_corpse()
+        self.gamemap.scheduler.remove(self.parent)
 
         self.engine.message_log.add_message(death_message, death_message_color)
 
@@ -87,3 +82,4 @@ class Fighter(BaseComponent):
 
     def take_damage(self, amount: int) -> None:
         self.hp -= amount
+        self.gamemap.mark_changed(self.parent)
@@ -1,6 +1,27 @@
+import random
+from typing import Optional
+
+from exceptions import GenerationBudgetExceeded
 from game_map import GameMap
 
 
 class BaseDungeonGenerator:
+    # All random choices of a generator are drawn from this, so a seeded rng reproduces a map.
+    rng: random.Random
+
+    # The number of iterations after which generation gives up, or None for no limit.
+    # Counting iterations instead of time keeps the outcome the same on every machine.
+    max_iterations: Optional[int] = None
+    iterations = 0
+
     def generate_dungeon(self) -> GameMap:
         raise NotImplementedError()
+
+    def _count_iteration(self) -> None:
+        """Count one iteration and raise GenerationBudgetExceeded past max_iterations.
+
+        Generators with long loops call this once per iteration of the loop.
+        """
+        self.iterations += 1
+        if self.max_iterations is not None and self.iterations > self.max_iterations:
+            raise GenerationBudgetExceeded()
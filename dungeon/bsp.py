@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import random
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 
 import tcod
 
@@ -19,12 +19,14 @@ class BSP(RoomTunnelBase):
             room_max_size: int,
             map_width: int,
             map_height: int,
-            engine: Engine
+            engine: Engine,
+            rng: Optional[random.Random] = None
     ):
         super().__init__(
             map_width=map_width,
             map_height=map_height,
-            engine=engine
+            engine=engine,
+            rng=rng
         )
         self.room_min_size = room_min_size
         self.room_max_size = room_max_size
@@ -38,7 +40,8 @@ class BSP(RoomTunnelBase):
             min_width=self.room_max_size + 1,
             min_height=self.room_max_size + 1,
             max_horizontal_ratio=1.5,
-            max_vertical_ratio=1.5
+            max_vertical_ratio=1.5,
+            seed=tcod.random.Random(seed=self.rng.getrandbits(32))
         )
 
         # In pre order, leaf nodes are visited before the nodes that connect them.
@@ -47,11 +50,11 @@ class BSP(RoomTunnelBase):
                 # Ignore non leaves
                 continue
             else:
-                room_width = random.randint(self.room_min_size, self.room_max_size)
-                room_height = random.randint(self.room_min_size, self.room_max_size)
+                room_width = self.rng.randint(self.room_min_size, self.room_max_size)
+                room_height = self.rng.randint(self.room_min_size, self.room_max_size)
 
-                x = random.randint(node.x, node.x + node.width - room_width - 1)
-                y = random.randint(node.y, node.y + node.height - room_height - 1)
+                x = self.rng.randint(node.x, node.x + node.width - room_width - 1)
+                y = self.rng.randint(node.y, node.y + node.height - room_height - 1)
 
                 # "RectangularRoom" class makes rectangles easier to work with
                 new_room = RectangularRoom(x, y, room_width, room_height)
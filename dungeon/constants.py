@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple, TYPE_CHECKING
+import bisect
+import itertools
+import random
+from typing import Any, Dict, List, Tuple, TypeVar, TYPE_CHECKING
 
 import entity_factories
 
@@ -8,6 +11,69 @@ import entity_factories
 if TYPE_CHECKING:
     from entity import Entity
 
+T = TypeVar("T")
+
+
+class SpawnChances:
+    """
+    Weighted chances of entities to spawn, by the floor from which they apply.
+
+    Later floors add entities or change their chances.  The cumulative weights of the
+    entities for a floor are computed on first use and cached.
+    """
+
+    def __init__(self, chances_by_floor: Dict[int, List[Tuple[Entity, int]]]):
+        self.chances_by_floor = chances_by_floor
+        self._floors = sorted(chances_by_floor)
+        # The entities and their cumulative weights, by the floor the table changes on.
+        self._tables: Dict[int, Tuple[List[Entity], List[int]]] = {}
+
+    def get_table(self, floor: int) -> Tuple[List[Entity], List[int]]:
+        """Return the entities which can spawn on `floor`, and their cumulative weights."""
+        # All floors up to the next change share the table of the latest change.
+        index = bisect.bisect_right(self._floors, floor)
+        if index == 0:
+            return [], []
+
+        key = self._floors[index - 1]
+        if key not in self._tables:
+            entity_weighted_chances: Dict[Entity, int] = {}
+            for chances_floor in self._floors[:index]:
+                for entity, weighted_chance in self.chances_by_floor[chances_floor]:
+                    entity_weighted_chances[entity] = weighted_chance
+
+            self._tables[key] = (
+                list(entity_weighted_chances),
+                list(itertools.accumulate(entity_weighted_chances.values())),
+            )
+
+        return self._tables[key]
+
+    def choose(self, number_of_entities: int, floor: int, rng: random.Random) -> List[Entity]:
+        """Return `number_of_entities` entities picked at random by their chances on `floor`."""
+        entities, cum_weights = self.get_table(floor)
+        return rng.choices(entities, cum_weights=cum_weights, k=number_of_entities)
+
+
+def get_max_value_for_floor(
+        max_value_by_floor: List[Tuple[int, T]], floor: int, default: Any = 0
+) -> T:
+    """Return the value of the last entry whose floor was reached, or `default` before the first."""
+    current_value = default
+
+    for floor_minimum, value in max_value_by_floor:
+        if floor_minimum > floor:
+            break
+        else:
+            current_value = value
+
+    return current_value
+
+
+# The name of the generator in procgen.generators, by the floor it is first used on.
+generator_by_floor = [
+    (1, "diffusion_limited_aggregation_2")
+]
 
 max_items_by_floor = [
     (1, 1),
@@ -20,16 +86,16 @@ max_monsters_by_floor = [
     (6, 5)
 ]
 
-item_chances: Dict[int, List[Tuple[Entity, int]]] = {
+item_chances = SpawnChances({
     0: [(entity_factories.health_potion, 35)],
     2: [(entity_factories.confusion_scroll, 10), (entity_factories.magic_missile_scroll, 10)],
     4: [(entity_factories.lightning_scroll, 25), (entity_factories.sword, 5)],
     6: [(entity_factories.fireball_scroll, 25), (entity_factories.chain_mail, 15)]
-}
+})
 
-enemy_chances: Dict[int, List[Tuple[Entity, int]]] = {
+enemy_chances = SpawnChances({
     0: [(entity_factories.orc, 80)],
     3: [(entity_factories.troll, 15)],
     5: [(entity_factories.troll, 30)],
     7: [(entity_factories.troll, 60)]
-}
+})
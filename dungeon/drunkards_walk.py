@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Set, Tuple, TYPE_CHECKING
+import random
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np  # type: ignore
 
 from dungeon.particles_base import ParticlesBase
 
@@ -9,6 +12,12 @@ if TYPE_CHECKING:
 
 
 class DrunkardsWalk(ParticlesBase):
+    """
+    Carves a cave by letting walkers stumble around from the middle of the map.
+
+    The steps of all walkers are drawn in chunks of `chunk_steps` and turned into
+    paths with a cumulative sum, so the walk runs in NumPy instead of step by step.
+    """
 
     def __init__(
             self,
@@ -17,29 +26,65 @@ class DrunkardsWalk(ParticlesBase):
             map_height: int,
             entity_rooms: int = 10,
             floor_tile_rate: float = 0.4,
-            engine: Engine):
+            walkers: int = 1,
+            chunk_steps: int = 256,
+            engine: Engine,
+            rng: Optional[random.Random] = None):
         super().__init__(
             map_width=map_width,
             map_height=map_height,
             entity_rooms=entity_rooms,
             floor_tile_rate=floor_tile_rate,
-            engine=engine
+            engine=engine,
+            rng=rng
         )
 
-    def _create_particles(self) -> Set[Tuple[int, int]]:
-        particle_x = int(self.map_width / 2)
-        particle_y = int(self.map_height / 2)
+        self.walkers = walkers
+        self.chunk_steps = chunk_steps
+
+    def _create_particles(self) -> np.ndarray:
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+
+        walkers_x = np.full(self.walkers, int(self.map_width / 2), dtype=np.intp)
+        walkers_y = np.full(self.walkers, int(self.map_height / 2), dtype=np.intp)
+        walker_indices = np.arange(self.walkers)
+
+        particles = np.zeros((self.map_width, self.map_height), dtype=bool)
+        particles[walkers_x[0], walkers_y[0]] = True
+        particle_count = 1
+        target_count = int(np.ceil(self.map_height * self.map_width * self.floor_tile_rate))
+
+        while particle_count < target_count:
+            self._count_iteration()
+
+            directions = self._get_random_directions(
+                self.chunk_steps * self.walkers, rng
+            ).reshape(self.chunk_steps, self.walkers, 2)
+            path_x = walkers_x + np.cumsum(directions[:, :, 0], axis=0)
+            path_y = walkers_y + np.cumsum(directions[:, :, 1], axis=0)
 
-        particles: Set[Tuple[int, int]] = {(particle_x, particle_y)}
+            # A step out of the map is skipped.  Steps are independent, so instead the
+            # rest of the chunk is dropped for that walker and drawn again next chunk.
+            valid = np.logical_and.accumulate(
+                (0 < path_x) & (path_x < self.map_width - 1)
+                & (0 < path_y) & (path_y < self.map_height - 1),
+                axis=0
+            )
 
-        while len(particles) < self.map_height * self.map_width * self.floor_tile_rate:
-            direction_x, direction_y = self._get_random_direction()
+            step_counts = np.count_nonzero(valid, axis=0)
+            last_steps = np.maximum(step_counts - 1, 0)
+            walkers_x = np.where(step_counts > 0, path_x[last_steps, walker_indices], walkers_x)
+            walkers_y = np.where(step_counts > 0, path_y[last_steps, walker_indices], walkers_y)
 
-            target_x = particle_x + direction_x
-            target_y = particle_y + direction_y
+            visited_x, visited_y = path_x[valid], path_y[valid]
+            if particle_count + visited_x.size <= target_count:
+                particles[visited_x, visited_y] = True
+                particle_count = int(np.count_nonzero(particles))
+                continue
 
-            if 0 < target_x < self.map_width - 1 and 0 < target_y < self.map_height - 1:
-                particles.add((target_x, target_y))
-                particle_x, particle_y = target_x, target_y
+            # The last chunk: the cells are added in step order, up to the target.
+            particle_count += self._add_particles(
+                particles, visited_x, visited_y, target_count - particle_count
+            )
 
         return particles
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import random
-from typing import Dict, List, Set, Tuple, TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
 
 from dungeon.base_dungeon_generator import BaseDungeonGenerator
-from dungeon.constants import max_items_by_floor, max_monsters_by_floor, enemy_chances, item_chances
+from dungeon.constants import (
+    enemy_chances, get_max_value_for_floor, item_chances, max_items_by_floor, max_monsters_by_floor
+)
 from entity import Actor
 from game_map import GameMap
 import tile_types
@@ -15,102 +19,63 @@ if TYPE_CHECKING:
 
 
 def _random_particle(
-        particles: Set[Tuple[int, int]]
+        particle_cells: np.ndarray,
+        dungeon: GameMap,
+        rng: random.Random
 ) -> Tuple[int, int]:
-    return random.choice(list(particles))
+    """Return a random particle from the flat indices of the particles in the map."""
+    x, y = divmod(int(particle_cells[rng.randrange(particle_cells.size)]), dungeon.height)
+    return x, y
 
 
 def _dig_out_particles(
         dungeon: GameMap,
-        particles: Set[Tuple[int, int]]
+        particles: np.ndarray
 ) -> None:
-    for particle in particles:
-        dungeon.tiles[particle] = tile_types.floor
+    dungeon.tiles[particles] = tile_types.floor
 
 
 def _place_player(
         player: Actor,
-        particles: Set[Tuple[int, int]],
-        dungeon: GameMap
+        particle_cells: np.ndarray,
+        dungeon: GameMap,
+        rng: random.Random
 ) -> None:
-    particle = _random_particle(particles)
+    particle = _random_particle(particle_cells, dungeon, rng)
     player.place(*particle, gamemap=dungeon)
 
 
 def _place_downstairs(
-        particles: Set[Tuple[int, int]],
-        dungeon: GameMap
+        particle_cells: np.ndarray,
+        dungeon: GameMap,
+        rng: random.Random
 ):
-    particle = _random_particle(particles)
+    particle = _random_particle(particle_cells, dungeon, rng)
 
     dungeon.tiles[particle] = tile_types.down_stairs
     dungeon.downstairs_location = particle
 
 
-def _get_max_value_for_floor(
-        max_value_by_floor: List[Tuple[int, int]], floor: int
-) -> int:
-    current_value = 0
-
-    for floor_minimum, value in max_value_by_floor:
-        if floor_minimum > floor:
-            break
-        else:
-            current_value = value
-
-    return current_value
-
-
-def _get_entities_at_random(
-        weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
-        number_of_entities: int,
-        floor: int,
-) -> List[Entity]:
-    entity_weighted_chances = {}
-
-    for key, values in weighted_chances_by_floor.items():
-        if key > floor:
-            break
-        else:
-            for value in values:
-                entity = value[0]
-                weighted_chance = value[1]
-
-                entity_weighted_chances[entity] = weighted_chance
-
-    entities = list(entity_weighted_chances.keys())
-    entity_weighted_chance_values = list(entity_weighted_chances.values())
-
-    chosen_entities = random.choices(
-        entities, weights=entity_weighted_chance_values, k=number_of_entities
-    )
-
-    return chosen_entities
-
-
 def _place_entities_internal(
-        particles: Set[Tuple[int, int]],
+        particle_cells: np.ndarray,
         dungeon: GameMap,
-        floor_number: int
+        floor_number: int,
+        rng: random.Random
 ) -> None:
-    number_of_monsters = random.randint(
-        0, _get_max_value_for_floor(max_monsters_by_floor, floor_number)
+    number_of_monsters = rng.randint(
+        0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
     )
-    number_of_items = random.randint(
-        0, _get_max_value_for_floor(max_items_by_floor, floor_number)
+    number_of_items = rng.randint(
+        0, get_max_value_for_floor(max_items_by_floor, floor_number)
     )
 
-    monsters: List[Entity] = _get_entities_at_random(
-        enemy_chances, number_of_monsters, floor_number
-    )
-    items: List[Entity] = _get_entities_at_random(
-        item_chances, number_of_items, floor_number
-    )
+    monsters: List[Entity] = enemy_chances.choose(number_of_monsters, floor_number, rng)
+    items: List[Entity] = item_chances.choose(number_of_items, floor_number, rng)
 
     for entity in monsters + items:
-        x, y = _random_particle(particles)
+        x, y = _random_particle(particle_cells, dungeon, rng)
 
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
+        if not dungeon.get_entities_at_location(x, y):
             entity.spawn(dungeon, x, y)
 
 
@@ -122,13 +87,15 @@ class ParticlesBase(BaseDungeonGenerator):
             map_height: int,
             entity_rooms: int,
             floor_tile_rate: float,
-            engine: Engine
+            engine: Engine,
+            rng: Optional[random.Random] = None
     ):
         self.map_width = map_width
         self.map_height = map_height
         self.entity_rooms = entity_rooms
         self.floor_tile_rate = floor_tile_rate
         self.engine = engine
+        self.rng = rng if rng is not None else random.Random()
 
     def _get_random_direction(self) -> Tuple[int, int]:
         directions = [
@@ -140,22 +107,64 @@ class ParticlesBase(BaseDungeonGenerator):
 
         weights = [self.map_height, self.map_height, self.map_width, self.map_width]
 
-        return random.choices(
+        return self.rng.choices(
             directions,
             weights=weights,
             k=1
         )[0]
 
+    def _get_random_directions(
+            self,
+            count: int,
+            rng: np.random.Generator
+    ) -> np.ndarray:
+        """Return `count` random directions as rows of an array, weighted like _get_random_direction."""
+        directions = np.array([
+            (0, -1),  # North
+            (0, 1),   # South
+            (1, 0),   # East
+            (-1, 0),  # West
+        ])
+
+        weights = np.array([self.map_height, self.map_height, self.map_width, self.map_width])
+
+        # The upper bounds of the first three directions on the unit interval.
+        thresholds = np.cumsum(weights[:-1]) / weights.sum()
+
+        return directions[np.searchsorted(thresholds, rng.random(count), side="right")]
+
+    @staticmethod
+    def _add_particles(
+            particles: np.ndarray,
+            cells_x: np.ndarray,
+            cells_y: np.ndarray,
+            limit: int
+    ) -> int:
+        """
+        Make the given cells particles, in order, up to `limit` new ones, and return how many.
+
+        Only the first of repeated cells counts, cells which are particles already are skipped.
+        """
+        cells = np.ravel_multi_index((cells_x, cells_y), particles.shape)
+        cells, first_index = np.unique(cells, return_index=True)
+        cells = cells[np.argsort(first_index)]
+        cells = cells[~particles[np.unravel_index(cells, particles.shape)]]
+        cells = cells[:limit]
+
+        particles[np.unravel_index(cells, particles.shape)] = True
+        return int(cells.size)
+
     def _place_entities(
             self,
-            particles: Set[Tuple[int, int]],
+            particle_cells: np.ndarray,
             dungeon: GameMap,
             floor_number: int,
     ) -> None:
         for i in range(self.entity_rooms):
-            _place_entities_internal(particles, dungeon, floor_number)
+            _place_entities_internal(particle_cells, dungeon, floor_number, self.rng)
 
-    def _create_particles(self) -> Set[Tuple[int, int]]:
+    def _create_particles(self) -> np.ndarray:
+        """Return a boolean array of the map size which is True for every particle."""
         raise NotImplementedError()
 
     def generate_dungeon(self) -> GameMap:
@@ -164,13 +173,15 @@ class ParticlesBase(BaseDungeonGenerator):
         dungeon = GameMap(self.engine, self.map_width, self.map_height, entities=[player])
 
         particles = self._create_particles()
+        # The flat indices of the particles, so a random one is picked in constant time.
+        particle_cells = np.flatnonzero(particles)
 
         _dig_out_particles(dungeon, particles)
 
-        _place_player(player, particles, dungeon)
+        _place_player(player, particle_cells, dungeon, self.rng)
 
-        _place_downstairs(particles, dungeon)
+        _place_downstairs(particle_cells, dungeon, self.rng)
 
-        self._place_entities(particles, dungeon, self.engine.game_world.current_floor)
+        self._place_entities(particle_cells, dungeon, self.engine.game_world.current_floor)
 
         return dungeon
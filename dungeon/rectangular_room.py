@@ -11,10 +11,10 @@ class RectangularRoom:
         self.x2 = x + width
         self.y2 = y + height
 
-    @property
-    def random_field(self) -> Tuple[int, int]:
-        center_x = random.randint(self.x1 + 1, self.x2 - 1)
-        center_y = random.randint(self.y1 + 1, self.y2 - 1)
+    def random_field(self, rng: random.Random) -> Tuple[int, int]:
+        """Return a random position inside of this room."""
+        center_x = rng.randint(self.x1 + 1, self.x2 - 1)
+        center_y = rng.randint(self.y1 + 1, self.y2 - 1)
 
         return center_x, center_y
 
@@ -23,6 +23,11 @@ class RectangularRoom:
         """Return the inner area of this room as a 2D array index."""
         return slice(self.x1 + 1, self.x2), slice(self.y1 + 1, self.y2)
 
+    @property
+    def outer(self) -> Tuple[slice, slice]:
+        """Return the whole area of this room, walls included, as a 2D array index."""
+        return slice(self.x1, self.x2 + 1), slice(self.y1, self.y2 + 1)
+
     def intersects(self, other: RectangularRoom) -> bool:
         """Return True if this room overlaps with another RectangularRoom."""
         return (
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import random
-from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
+import numpy as np  # type: ignore
 import tcod
 
 from dungeon.base_dungeon_generator import BaseDungeonGenerator
 from dungeon.rectangular_room import RectangularRoom
-from dungeon.constants import max_items_by_floor, max_monsters_by_floor, enemy_chances, item_chances
+from dungeon.constants import (
+    enemy_chances, get_max_value_for_floor, item_chances, max_items_by_floor, max_monsters_by_floor
+)
 from entity import Actor
 from game_map import GameMap
 import tile_types
@@ -22,73 +25,44 @@ class RoomTunnelBase(BaseDungeonGenerator):
             self,
             map_width: int,
             map_height: int,
-            engine: Engine
+            engine: Engine,
+            rng: Optional[random.Random] = None
     ):
         self.map_width = map_width
         self.map_height = map_height
         self.engine = engine
+        self.rng = rng if rng is not None else random.Random()
 
     def _connect_rooms(
             self,
             rooms: List[RectangularRoom],
             dungeon: GameMap) -> None:
-        for i in range(0, len(rooms) - 1):
-            room1 = rooms[i]
-            room2 = rooms[i + 1]
+        """Dig tunnels between consecutive rooms, all in one assignment."""
+        tunnels = [
+            self._tunnel_between(room1.random_field(self.rng), room2.random_field(self.rng))
+            for room1, room2 in zip(rooms, rooms[1:])
+        ]
 
-            for x, y in self._tunnel_between(room1.random_field, room2.random_field):
-                dungeon.tiles[x, y] = tile_types.floor
+        if not tunnels:
+            return
 
-    def _get_max_value_for_floor(
-            self,
-            max_value_by_floor: List[Tuple[int, int]], floor: int
-    ) -> int:
-        current_value = 0
-
-        for floor_minimum, value in max_value_by_floor:
-            if floor_minimum > floor:
-                break
-            else:
-                current_value = value
-
-        return current_value
-
-    def _get_entities_at_random(
-            self,
-            weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
-            number_of_entities: int,
-            floor: int,
-    ) -> List[Entity]:
-        entity_weighted_chances = {}
-
-        for key, values in weighted_chances_by_floor.items():
-            if key > floor:
-                break
-            else:
-                for value in values:
-                    entity = value[0]
-                    weighted_chance = value[1]
-
-                    entity_weighted_chances[entity] = weighted_chance
-
-        entities = list(entity_weighted_chances.keys())
-        entity_weighted_chance_values = list(entity_weighted_chances.values())
-
-        chosen_entities = random.choices(
-            entities, weights=entity_weighted_chance_values, k=number_of_entities
-        )
+        tunnel_x, tunnel_y = np.concatenate(tunnels).T
+        # Writing whole tiles is slow, so only tunnel tiles which are not floor yet are written.
+        carved = np.zeros((self.map_width, self.map_height), dtype=bool)
+        carved[tunnel_x, tunnel_y] = True
+        carved &= ~dungeon.tiles["walkable"]
 
-        return chosen_entities
+        dungeon.tiles[carved] = tile_types.floor
 
     def _tunnel_between(
             self,
             start: Tuple[int, int],
             end: Tuple[int, int]
-    ) -> Iterator[Tuple[int, int]]:
-        """Return an L-shaped tunnel between these two points."""
+    ) -> np.ndarray:
+        """Return the coordinates of an L-shaped tunnel between these two points, one per row."""
         x1, y1 = start
         x2, y2 = end
-        if random.random() < 0.5:  # 50% chance.
+        if self.rng.random() < 0.5:  # 50% chance.
             # Move horizontally, then vertically.
             corner_x, corner_y = x2, y1
         else:
@@ -96,23 +70,23 @@ class RoomTunnelBase(BaseDungeonGenerator):
             corner_x, corner_y = x1, y2
 
         # Generate the coordinates for this tunnel.
-        for x, y in tcod.los.bresenham((x1, y1), (corner_x, corner_y)).tolist():
-            yield x, y
-        for x, y in tcod.los.bresenham((corner_x, corner_y), (x2, y2)).tolist():
-            yield x, y
+        return np.concatenate((
+            tcod.los.bresenham((x1, y1), (corner_x, corner_y)),
+            tcod.los.bresenham((corner_x, corner_y), (x2, y2)),
+        ))
 
     def _get_random_room(
             self,
             rooms: List[RectangularRoom]
     ) -> RectangularRoom:
-        return rooms[random.randrange(0, len(rooms))]
+        return rooms[self.rng.randrange(0, len(rooms))]
 
     def _place_downstairs(
             self,
             rooms: List[RectangularRoom],
             dungeon: GameMap
     ):
-        field = self._get_random_room(rooms).random_field
+        field = self._get_random_room(rooms).random_field(self.rng)
 
         dungeon.tiles[field] = tile_types.down_stairs
         dungeon.downstairs_location = field
@@ -124,7 +98,7 @@ class RoomTunnelBase(BaseDungeonGenerator):
             dungeon: GameMap
     ) -> None:
         room = self._get_random_room(rooms)
-        player.place(*room.random_field, gamemap=dungeon)
+        player.place(*room.random_field(self.rng), gamemap=dungeon)
 
     def _place_entities(
             self,
@@ -141,24 +115,20 @@ class RoomTunnelBase(BaseDungeonGenerator):
             dungeon: GameMap,
             floor_number: int
     ) -> None:
-        number_of_monsters = random.randint(
-            0, self._get_max_value_for_floor(max_monsters_by_floor, floor_number)
+        number_of_monsters = self.rng.randint(
+            0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
         )
-        number_of_items = random.randint(
-            0, self._get_max_value_for_floor(max_items_by_floor, floor_number)
+        number_of_items = self.rng.randint(
+            0, get_max_value_for_floor(max_items_by_floor, floor_number)
         )
 
-        monsters: List[Entity] = self._get_entities_at_random(
-            enemy_chances, number_of_monsters, floor_number
-        )
-        items: List[Entity] = self._get_entities_at_random(
-            item_chances, number_of_items, floor_number
-        )
+        monsters: List[Entity] = enemy_chances.choose(number_of_monsters, floor_number, self.rng)
+        items: List[Entity] = item_chances.choose(number_of_items, floor_number, self.rng)
 
         for entity in monsters + items:
-            x, y = room.random_field
+            x, y = room.random_field(self.rng)
 
-            if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
+            if not dungeon.get_entities_at_location(x, y):
                 entity.spawn(dungeon, x, y)
 
     def _dig_out_rooms(
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import random
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 
+import numpy as np  # type: ignore
 
 from dungeon.room_tunnel_base import RoomTunnelBase
 from dungeon.rectangular_room import RectangularRoom
@@ -20,12 +21,14 @@ class Simple(RoomTunnelBase):
             room_max_size: int,
             map_width: int,
             map_height: int,
-            engine: Engine
+            engine: Engine,
+            rng: Optional[random.Random] = None
     ):
         super().__init__(
             map_width=map_width,
             map_height=map_height,
-            engine=engine
+            engine=engine,
+            rng=rng
         )
         self.max_rooms = max_rooms
         self.room_min_size = room_min_size
@@ -33,22 +36,27 @@ class Simple(RoomTunnelBase):
 
     def _create_rooms(self) -> List[RectangularRoom]:
         rooms: List[RectangularRoom] = []
+        # The tiles covered by the rooms so far, walls included.  A new room overlaps
+        # one of them exactly when its own area covers one of these tiles, so the
+        # check does not grow with the number of rooms.
+        occupied = np.zeros((self.map_width, self.map_height), dtype=bool)
 
         for r in range(self.max_rooms):
-            room_width = random.randint(self.room_min_size, self.room_max_size)
-            room_height = random.randint(self.room_min_size, self.room_max_size)
+            room_width = self.rng.randint(self.room_min_size, self.room_max_size)
+            room_height = self.rng.randint(self.room_min_size, self.room_max_size)
 
-            x = random.randint(0, self.map_width - room_width - 1)
-            y = random.randint(0, self.map_height - room_height - 1)
+            x = self.rng.randint(0, self.map_width - room_width - 1)
+            y = self.rng.randint(0, self.map_height - room_height - 1)
 
             # "RectangularRoom" class makes rectangles easier to work with
             new_room = RectangularRoom(x, y, room_width, room_height)
 
-            # Run through the other rooms and see if they intersect with this one.
-            if any(new_room.intersects(other_room) for other_room in rooms):
+            # See if the other rooms intersect with this one.
+            if occupied[new_room.outer].any():
                 continue  # This room intersects, so go to the next attempt.
             # If there are no intersections then the room is valid.
 
             rooms.append(new_room)
+            occupied[new_room.outer] = True
 
         return rooms
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import List, TYPE_CHECKING
+import random
+from typing import List, Optional, TYPE_CHECKING
 
 import tcod
 
@@ -17,12 +18,14 @@ class SimpleLabyrinth(RoomTunnelBase):
             room_min_size: int,
             map_width: int,
             map_height: int,
-            engine: Engine
+            engine: Engine,
+            rng: Optional[random.Random] = None
     ):
         super().__init__(
             map_width=map_width,
             map_height=map_height,
-            engine=engine
+            engine=engine,
+            rng=rng
         )
         self.room_min_size = room_min_size
 
@@ -35,7 +38,8 @@ class SimpleLabyrinth(RoomTunnelBase):
             min_width=self.room_min_size,
             min_height=self.room_min_size,
             max_horizontal_ratio=1.2,
-            max_vertical_ratio=1.2
+            max_vertical_ratio=1.2,
+            seed=tcod.random.Random(seed=self.rng.getrandbits(32))
         )
 
         # In pre order, leaf nodes are visited before the nodes that connect them.
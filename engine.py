@@ -1,16 +1,15 @@
 from __future__ import annotations
 
-import lzma
-import pickle
-from typing import TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
+import tcod
 from tcod.console import Console
-from tcod.constants import FOV_BASIC
-from tcod.map import compute_fov
 
 import exceptions
 from message_log import MessageLog
+import profiling
 import render_functions
+import savegame
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -25,26 +24,62 @@ class Engine:
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
         self.player = player
+        self.turn = 0  # The number of turns the player has taken.
+        self._player_pathfinder: Optional[tcod.path.Pathfinder] = None
 
+    @profiling.timed("enemy_turns")
     def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                try:
-                    entity.ai.perform()
-                except exceptions.Impossible:
-                    pass  # Ignore impossible action exceptions from AI.
+        """Let the monsters whose actions are due act, as scheduled by the game map."""
+        scheduler = self.game_map.scheduler
+        try:
+            for entity in scheduler.advance():
+                # Its AI, health and so on may change, see GameMap.take_changes.
+                self.game_map.mark_changed(entity)
 
+                if entity.ai:
+                    try:
+                        if profiling.enabled:
+                            with profiling.timing(f"enemy_turn.{type(entity.ai).__name__}"):
+                                entity.ai.perform()
+                        else:
+                            entity.ai.perform()
+                    except exceptions.Impossible:
+                        pass  # Ignore impossible action exceptions from AI.
+
+                # Monsters with nothing to do are skipped until the player sees them.
+                if entity.ai and entity.ai.is_dormant():
+                    scheduler.sleep(entity)
+        finally:
+            # The pathfinder is only valid for the turn it was computed in.
+            self._player_pathfinder = None
+
+    def get_path_to_player(self, x: int, y: int) -> List[Tuple[int, int]]:
+        """Compute and return a path from the given position to the player.
+
+        A single pathfinder rooted at the player is built on first use and then shared
+        by every caller during the current enemy turn, so monsters only descend it.
+
+        If there is no valid path then returns an empty list.
+        """
+        if self._player_pathfinder is None:
+            graph = tcod.path.SimpleGraph(
+                cost=self.game_map.get_movement_cost(), cardinal=2, diagonal=3
+            )
+            self._player_pathfinder = tcod.path.Pathfinder(graph)
+            self._player_pathfinder.add_root((self.player.x, self.player.y))
+
+        # Compute the path from the position to the player and remove the starting point.
+        path: List[List[int]] = self._player_pathfinder.path_from((x, y))[1:].tolist()
+
+        # Convert from List[List[int]] to List[Tuple[int, int]].
+        return [(index[0], index[1]) for index in path]
+
+    @profiling.timed("update_fov")
     def update_fov(self) -> None:
         """Recompute the visible area based on the players point of view."""
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8,
-            algorithm=FOV_BASIC
-        )
-        # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        self.game_map.update_fov(self.player.x, self.player.y, radius=8)
 
+    @profiling.timed("render")
     def render(self, console: Console) -> None:
         self.game_map.render(console)
 
@@ -69,6 +104,4 @@ class Engine:
 
     def save_as(self, filename: str) -> None:
         """Save this Engine instance as a compressed file."""
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        savegame.save(self, filename)
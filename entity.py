@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import copy
 import math
 from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
 from render_order import RenderOrder
+from scheduler import NORMAL_SPEED
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -42,24 +42,37 @@ class Entity:
         self.char = char
         self.color = color
         self.name = name
+        # The name this entity was created with, which stays the same when its name
+        # changes.  Clones keep it, so it names their prototype in entity_factories.
+        self.prototype_name = name
         self.blocks_movement = blocks_movement
         self.render_order = render_order
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
         return self.parent.gamemap
 
+    def clone(self: T) -> T:
+        """Return a copy of this entity without a parent.
+
+        Attributes are shared with this entity, subclasses copy their components.
+        """
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.__dict__.pop("parent", None)
+        return clone
+
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
@@ -69,9 +82,12 @@ class Entity:
         if gamemap:
             if hasattr(self, "parent"):  # Possibly uninitialized.
                 if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+                    self.gamemap.remove_entity(self)
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        elif hasattr(self, "parent") and self.parent is self.gamemap:
+            # Keep the location index of the map this entity lies on up to date.
+            self.gamemap.relocate_entity(self)
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -81,8 +97,7 @@ class Entity:
 
     def move(self, dx: int, dy: int) -> None:
         # Move the entity by a given amount
-        self.x += dx
-        self.y += dy
+        self.place(self.x + dx, self.y + dy)
 
 
 class Actor(Entity):
@@ -98,7 +113,8 @@ class Actor(Entity):
         equipment: Equipment,
         fighter: Fighter,
         inventory: Inventory,
-        level: Level
+        level: Level,
+        speed: int = NORMAL_SPEED
     ):
         super().__init__(
             x=x,
@@ -111,6 +127,8 @@ class Actor(Entity):
         )
 
         self.ai: Optional[BaseAI] = ai_cls(self)
+        # How often this actor acts, NORMAL_SPEED is once per turn of the player.
+        self.speed = speed
 
         self.equipment: Equipment = equipment
         self.equipment.parent = self
@@ -124,11 +142,43 @@ class Actor(Entity):
         self.level = level
         self.level.parent = self
 
+    def clone(self) -> Actor:
+        clone = super().clone()
+
+        clone.ai = self.ai.clone(clone) if self.ai else None
+
+        clone.inventory = self.inventory.clone()
+        clone.inventory.parent = clone
+
+        # Equipped items are always in the inventory, so the copies are equipped instead.
+        copies = dict(zip(self.inventory.items, clone.inventory.items))
+        clone.equipment = self.equipment.clone()
+        clone.equipment.weapon = copies.get(self.equipment.weapon)
+        clone.equipment.armor = copies.get(self.equipment.armor)
+        clone.equipment.parent = clone
+
+        clone.fighter = self.fighter.clone()
+        clone.fighter.parent = clone
+
+        clone.level = self.level.clone()
+        clone.level.parent = clone
+
+        return clone
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
         return bool(self.ai)
 
+    def become_corpse(self) -> None:
+        """Turn this actor into its remains, which neither act nor block movement."""
+        self.char = "%"
+        self.color = (191, 0, 0)
+        self.blocks_movement = False
+        self.ai = None
+        self.name = f"remains of {self.name}"
+        self.render_order = RenderOrder.CORPSE
+
 
 class Item(Entity):
     def __init__(
@@ -161,3 +211,16 @@ class Item(Entity):
 
         if self.equippable:
             self.equippable.parent = self
+
+    def clone(self) -> Item:
+        clone = super().clone()
+
+        if self.consumable:
+            clone.consumable = self.consumable.clone()
+            clone.consumable.parent = clone
+
+        if self.equippable:
+            clone.equippable = self.equippable.clone()
+            clone.equippable.parent = clone
+
+        return clone
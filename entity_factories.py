@@ -1,10 +1,15 @@
+from __future__ import annotations
+
+from typing import Dict
+
 from components.ai import HostileEnemy
 from components import consumable, equippable
 from components.equipment import Equipment
 from components.fighter import Fighter
 from components.inventory import Inventory
 from components.level import Level
-from entity import Actor, Item
+from entity import Actor, Entity, Item
+
 
 player = Actor(
     char="@",
@@ -114,3 +119,22 @@ health_potion = Item(
     name="Health Potion",
     consumable=consumable.HealingConsumable(amount=4)
 )
+
+# All prototypes by name.  Entities are spawned as clones of these.
+prototypes: Dict[str, Entity] = {
+    prototype.name: prototype
+    for prototype in (
+        player,
+        orc,
+        troll,
+        confusion_scroll,
+        magic_missile_scroll,
+        lightning_scroll,
+        fireball_scroll,
+        dagger,
+        sword,
+        leather_armor,
+        chain_mail,
+        health_potion,
+    )
+}
@@ -7,3 +7,7 @@ class Impossible(Exception):
 
 class QuitWithoutSaving(SystemExit):
     """Can be raised to exit the game without automatically saving."""
+
+
+class GenerationBudgetExceeded(Exception):
+    """Raised by a dungeon generator which ran more iterations than its budget allows."""
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+import multiprocessing
+from multiprocessing.pool import AsyncResult, Pool
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
 from tcod.console import Console
+from tcod.constants import FOV_BASIC
+from tcod.map import compute_fov
 
 from entity import Actor, Item
+from helper.circle import clip_disk
+import profiling
+from render_order import RenderOrder
+from scheduler import Scheduler
 import tile_types
 
 if TYPE_CHECKING:
@@ -14,12 +23,33 @@ if TYPE_CHECKING:
 
 
 class GameMap:
+    # The side of the square grid cells actors are bucketed by for range queries.
+    ACTOR_BUCKET_SIZE = 8
+
     def __init__(
             self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        # The entities on this map in the order they were added, so iteration is reproducible.
+        self.entities: Dict[Entity, None] = {}
+
+        # Spatial index of the entities on this map, keyed by their location.
+        self._entities_by_location: Dict[Tuple[int, int], List[Entity]] = {}
+        # The location each entity is currently indexed at.
+        self._entity_locations: Dict[Entity, Tuple[int, int]] = {}
+        # The actors on this map by grid cell of ACTOR_BUCKET_SIZE tiles, for range queries.
+        self._actors_by_bucket: Dict[Tuple[int, int], Dict[Actor, None]] = {}
+        # Decides when the actors on this map other than the player act.
+        self.scheduler = Scheduler()
+        # The entities added, indexed and changed in any way since take_changes was last called.
+        self._added_entities: Dict[Entity, None] = {}
+        self._indexed_entities: Dict[Entity, None] = {}
+        self._changed_entities: Dict[Entity, None] = {}
+
+        for entity in entities:
+            self.add_entity(entity)
+
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
 
         self.visible = np.full(
@@ -32,6 +62,45 @@ class GameMap:
 
         self.downstairs_location = (0, 0)
 
+        # Increase this whenever tiles["transparent"] changes after the map was generated.
+        self.transparency_version = 0
+
+        # The point of view the "visible" array was computed for, and the area it covers.
+        self._fov_key: Optional[Tuple[int, int, int, int]] = None
+        self._fov_window: Tuple[slice, slice] = (slice(0, 0), slice(0, 0))
+
+        # The graphics of the map layer, and the point of view they were selected for.
+        self._map_layer: Optional[np.ndarray] = None
+        self._map_layer_key: Optional[Tuple[int, int, int, int]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # The map layer is cheap to select again, so it is not saved.
+        state["_map_layer"] = None
+        state["_map_layer_key"] = None
+        # The lookups by location and by bucket are rebuilt from the entity locations on load.
+        del state["_entities_by_location"]
+        del state["_actors_by_bucket"]
+        # Changes are tracked from the state which was saved.
+        del state["_added_entities"]
+        del state["_indexed_entities"]
+        del state["_changed_entities"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # The entity locations are in the order the entities were indexed in, so every
+        # location lists its entities in the same order as before.
+        self._entities_by_location = {}
+        self._actors_by_bucket = {}
+        self._added_entities = {}
+        self._indexed_entities = {}
+        self._changed_entities = {}
+        for entity, location in self._entity_locations.items():
+            self._entities_by_location.setdefault(location, []).append(entity)
+            if isinstance(entity, Actor):
+                self._bucket_actor(entity, location)
+
     @property
     def gamemap(self) -> GameMap:
         return self
@@ -49,30 +118,228 @@ class GameMap:
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
 
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map and index it at its current location."""
+        if entity in self.entities:
+            self._unindex_entity(entity)
+        else:
+            # Kept in the order of self.entities, where a new entity goes to the end.
+            self._added_entities.pop(entity, None)
+            self._added_entities[entity] = None
+
+        self.entities[entity] = None
+        self._index_entity(entity)
+
+        if isinstance(entity, Actor) and entity is not self.engine.player:
+            self.scheduler.add(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map, from the location index and from the scheduler."""
+        del self.entities[entity]
+        self._unindex_entity(entity)
+        self.mark_changed(entity)
+
+        if isinstance(entity, Actor):
+            self.scheduler.remove(entity)
+
+    def relocate_entity(self, entity: Entity) -> None:
+        """Update the location index after an entity on this map has moved."""
+        self._unindex_entity(entity)
+        self._index_entity(entity)
+
+    def mark_changed(self, entity: Entity) -> None:
+        """Record that an entity on this map, or held by an actor on it, has changed."""
+        self._changed_entities[entity] = None
+
+    def take_changes(self) -> Tuple[List[Entity], List[Entity], List[Entity]]:
+        """
+        Return the entities which changed since the last call, and forget them.
+
+        These are the entities added to this map, in the order they were last added
+        in, the entities indexed at a location, in the order they were last indexed in,
+        and every entity which changed in any way, including those and the removed ones.
+        Added and indexed entities which are no longer on this map are left out.
+        """
+        added = [entity for entity in self._added_entities if entity in self.entities]
+        indexed = [
+            entity for entity in self._indexed_entities if entity in self._entity_locations
+        ]
+        changed = list(self._changed_entities)
+
+        self._added_entities = {}
+        self._indexed_entities = {}
+        self._changed_entities = {}
+        return added, indexed, changed
+
+    def _index_entity(self, entity: Entity) -> None:
+        location = entity.x, entity.y
+        self._entity_locations[entity] = location
+        self._indexed_entities.pop(entity, None)
+        self._indexed_entities[entity] = None
+        self.mark_changed(entity)
+        self._entities_by_location.setdefault(location, []).append(entity)
+        if isinstance(entity, Actor):
+            self._bucket_actor(entity, location)
+
+    def _unindex_entity(self, entity: Entity) -> None:
+        location = self._entity_locations.pop(entity)
+        entities_at_location = self._entities_by_location[location]
+        entities_at_location.remove(entity)
+        if not entities_at_location:
+            del self._entities_by_location[location]
+
+        if isinstance(entity, Actor):
+            bucket_key = self._get_bucket_key(*location)
+            bucket = self._actors_by_bucket[bucket_key]
+            del bucket[entity]
+            if not bucket:
+                del self._actors_by_bucket[bucket_key]
+
+    def _get_bucket_key(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.ACTOR_BUCKET_SIZE, y // self.ACTOR_BUCKET_SIZE
+
+    def _bucket_actor(self, actor: Actor, location: Tuple[int, int]) -> None:
+        self._actors_by_bucket.setdefault(self._get_bucket_key(*location), {})[actor] = None
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        """Return all entities at the given location."""
+        return list(self._entities_by_location.get((x, y), ()))
+
+    def get_items_at_location(self, x: int, y: int) -> List[Item]:
+        """Return all items lying at the given location."""
+        return [
+            entity
+            for entity in self._entities_by_location.get((x, y), ())
+            if isinstance(entity, Item)
+        ]
+
     def get_blocking_entity_at_location(
             self, location_x: int, location_y: int
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                    entity.blocks_movement
-                    and entity.x == location_x
-                    and entity.y == location_y
-            ):
+        for entity in self._entities_by_location.get((location_x, location_y), ()):
+            if entity.blocks_movement:
                 return entity
 
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self._entities_by_location.get((x, y), ()):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
 
         return None
 
+    def get_actors_in_circle(self, x: int, y: int, radius: int) -> List[Actor]:
+        """Return the living actors within `radius` of the given location (see is_in).
+
+        The cells of the cached disk for the radius are looked up in the location
+        index, so this does not depend on the number of actors on the map.
+        """
+        (window_x, window_y), disk = clip_disk((x, y), radius, (self.width, self.height))
+        cells_x, cells_y = np.nonzero(disk)
+        cells_x += window_x.start
+        cells_y += window_y.start
+
+        return [
+            entity
+            for location in zip(cells_x.tolist(), cells_y.tolist())
+            for entity in self._entities_by_location.get(location, ())
+            if isinstance(entity, Actor) and entity.is_alive
+        ]
+
+    def get_actors_in_range(
+            self,
+            x: int,
+            y: int,
+            radius: int,
+            *,
+            visible_only: bool = False,
+            count: Optional[int] = None
+    ) -> List[Actor]:
+        """Return the living actors within `radius` of the given location, nearest first.
+
+        With `visible_only` only actors on visible tiles are returned, and with `count`
+        at most that many.  Only the actor buckets overlapping the range are searched.
+        """
+        bucket_x1, bucket_y1 = self._get_bucket_key(x - radius, y - radius)
+        bucket_x2, bucket_y2 = self._get_bucket_key(x + radius, y + radius)
+        # The same test as helper.circle.is_in, on the squared distance.
+        max_distance_squared = (radius + 0.5) ** 2
+
+        actors_by_distance: List[Tuple[int, Actor]] = []
+        for bucket_x in range(bucket_x1, bucket_x2 + 1):
+            for bucket_y in range(bucket_y1, bucket_y2 + 1):
+                for actor in self._actors_by_bucket.get((bucket_x, bucket_y), ()):
+                    distance_squared = (actor.x - x) ** 2 + (actor.y - y) ** 2
+                    if (
+                        distance_squared <= max_distance_squared
+                        and actor.is_alive
+                        and (not visible_only or self.visible[actor.x, actor.y])
+                    ):
+                        actors_by_distance.append((distance_squared, actor))
+
+        # Sorting is stable, so actors at the same distance stay in bucket order.
+        actors_by_distance.sort(key=lambda distance_and_actor: distance_and_actor[0])
+
+        return [actor for _, actor in actors_by_distance[:count]]
+
+    def get_movement_cost(self) -> np.ndarray:
+        """Return a pathfinding cost array for this map.
+
+        Walkable tiles cost 1 and walls 0 (blocked).  Tiles occupied by an entity
+        which blocks movement get an additional cost, taken from the location index.
+        """
+        # Copy the walkable array.
+        cost = np.array(self.tiles["walkable"], dtype=np.int8)
+
+        for (x, y), entities in self._entities_by_location.items():
+            # Check that an entity blocks movement and the cost isn't zero (blocking.)
+            if cost[x, y] and any(entity.blocks_movement for entity in entities):
+                # Add to the cost of a blocked position.
+                # A lower number means more enemies will crowd behind each other in
+                # hallways.  A higher number means enemies will take longer paths in
+                # order to surround the player.
+                cost[x, y] += 10
+
+        return cost
+
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def update_fov(self, x: int, y: int, radius: int) -> None:
+        """Recompute the visible area seen from (x, y) and add it to the explored area.
+
+        Nothing is computed if neither the point of view, the radius nor the
+        transparency of the tiles changed since the last call.  Otherwise only the
+        window within `radius` of the point of view is computed, and the dormant
+        actors which come into view are woken.
+        """
+        fov_key = (x, y, radius, self.transparency_version)
+        if fov_key == self._fov_key:
+            return
+
+        self.visible[self._fov_window] = False
+
+        window = (
+            slice(max(0, x - radius), min(self.width, x + radius + 1)),
+            slice(max(0, y - radius), min(self.height, y + radius + 1)),
+        )
+        self.visible[window] = compute_fov(
+            self.tiles["transparent"][window],
+            (x - window[0].start, y - window[1].start),
+            radius=radius,
+            algorithm=FOV_BASIC
+        )
+        # If a tile is "visible" it should be added to "explored".
+        self.explored[window] |= self.visible[window]
+
+        self._fov_key = fov_key
+        self._fov_window = window
+
+        # Dormant actors cannot move, so only a new point of view can reveal them.
+        self._wake_visible_actors()
+
     def render(self, console: Console) -> None:
         """
         Renders the map.
@@ -80,24 +347,143 @@ class GameMap:
         If a tile is in the "visible" array, then draw it with the "light" colors.
         If it isn't, but it's in the "explored" array, then draw it with the "dark" colors.
         Otherwise, the default is "SHROUD".
+
+        The visible and explored areas only change in update_fov, so the tile graphics are
+        selected again only when its point of view changed since the last render.
         """
-        console.tiles_rgb[0 : self.width, 0 : self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.SHROUD
-        )
+        if self._map_layer is None or self._map_layer_key != self._fov_key:
+            self._map_layer = np.select(
+                condlist=[self.visible, self.explored],
+                choicelist=[self.tiles["light"], self.tiles["dark"]],
+                default=tile_types.SHROUD
+            )
+            self._map_layer_key = self._fov_key
 
-        entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
-        )
+        console.tiles_rgb[0 : self.width, 0 : self.height] = self._map_layer
 
-        for entity in entities_sorted_for_rendering:
-            # Only print entities that are in the FOV
-            if self.visible[entity.x, entity.y]:
+        for entities in self._get_visible_entities_by_render_order().values():
+            for entity in entities:
                 console.print(
                     x=entity.x, y=entity.y, string=entity.char, fg=entity.color
                 )
 
+    def _get_visible_locations(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over the visible tiles, looking only at the area of the last FOV computation."""
+        window_x, window_y = self._fov_window
+        visible_x, visible_y = np.nonzero(self.visible[self._fov_window])
+        visible_x += window_x.start
+        visible_y += window_y.start
+
+        return zip(visible_x.tolist(), visible_y.tolist())
+
+    def _get_visible_entities_by_render_order(self) -> Dict[RenderOrder, List[Entity]]:
+        """Return the entities in the FOV, bucketed from the bottom render layer up.
+
+        Only the visible tiles are looked up in the location index, so this scales with
+        the visible area instead of with all entities on the map.
+        """
+        buckets: Dict[RenderOrder, List[Entity]] = {
+            render_order: [] for render_order in RenderOrder
+        }
+
+        for location in self._get_visible_locations():
+            for entity in self._entities_by_location.get(location, ()):
+                buckets[entity.render_order].append(entity)
+
+        return buckets
+
+    def _wake_visible_actors(self) -> None:
+        """Wake the dormant actors the player can see, so they are scheduled again."""
+        for location in self._get_visible_locations():
+            for entity in self._entities_by_location.get(location, ()):
+                if isinstance(entity, Actor) and entity.is_alive:
+                    self.scheduler.wake(entity)
+
+
+_pregeneration_pool: Optional[Pool] = None
+
+
+def _get_pregeneration_pool() -> Pool:
+    """Return the worker process pool used to pregenerate floors, starting it on first use."""
+    global _pregeneration_pool
+
+    if _pregeneration_pool is None:
+        # Spawn instead of fork, the worker must not inherit the state of the game window.
+        # Its process is a daemon, so it is terminated instead of waited for on exit.
+        _pregeneration_pool = multiprocessing.get_context("spawn").Pool(processes=1)
+
+    return _pregeneration_pool
+
+
+def _stop_pregeneration() -> None:
+    """Terminate the worker along with the floor it is generating, if any.
+
+    A new worker is started by the next pregeneration.
+    """
+    global _pregeneration_pool
+
+    if _pregeneration_pool is not None:
+        _pregeneration_pool.terminate()
+        _pregeneration_pool = None
+
+
+def get_floor_rng(seed: int, floor: int, fallback: Optional[str] = None) -> random.Random:
+    """
+    Return the random number generator which generates the given floor of a game world.
+
+    The `fallback` generator which replaces one that exceeded its budget gets its own.
+    """
+    if fallback is not None:
+        return random.Random(f"{seed}/{floor}/{fallback}")
+    return random.Random(f"{seed}/{floor}")
+
+
+def _generate_floor(
+    *,
+    floor: int,
+    seed: int,
+    map_width: int,
+    map_height: int,
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    generator: Optional[str]
+) -> GameMap:
+    """
+    Generate the given floor with a placeholder engine and player.
+
+    The generator draws from get_floor_rng, so the result is the same whether this
+    runs in a worker process or in the game itself.
+    """
+    from engine import Engine
+    import entity_factories
+    from procgen import generate_dungeon
+
+    engine = Engine(player=entity_factories.player.clone())
+    engine.game_world = GameWorld(
+        engine=engine,
+        map_width=map_width,
+        map_height=map_height,
+        max_rooms=max_rooms,
+        room_min_size=room_min_size,
+        room_max_size=room_max_size,
+        current_floor=floor,
+        seed=seed,
+        generator=generator,
+        pregenerate=False
+    )
+
+    return generate_dungeon(
+        max_rooms=max_rooms,
+        room_min_size=room_min_size,
+        room_max_size=room_max_size,
+        map_width=map_width,
+        map_height=map_height,
+        engine=engine,
+        rng=get_floor_rng(seed, floor),
+        generator=generator
+    )
+
 
 class GameWorld:
     """
@@ -113,7 +499,10 @@ class GameWorld:
         max_rooms: int,
         room_min_size: int,
         room_max_size: int,
-        current_floor: int = 0
+        current_floor: int = 0,
+        seed: Optional[int] = None,
+        generator: Optional[str] = None,
+        pregenerate: bool = True
     ):
         self.engine = engine
 
@@ -127,16 +516,83 @@ class GameWorld:
 
         self.current_floor = current_floor
 
-    def generate_floor(self) -> None:
-        from procgen import generate_dungeon
+        # Every floor is generated from this seed, see _generate_floor.
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        # The random choices made while playing, such as the moves of confused monsters.
+        self.rng = random.Random(f"{self.seed}/play")
 
-        self.current_floor += 1
+        # The name of the procgen generator for every floor, or None to choose by floor.
+        self.generator = generator
+
+        # If True, the next floor is generated in a worker process while the current one is played.
+        self.pregenerate = pregenerate
+        self._pregenerated_floor: Optional[Tuple[int, AsyncResult]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # A pending worker result can not be saved, the floor will be generated again.
+        state["_pregenerated_floor"] = None
+        return state
 
-        self.engine.game_map = generate_dungeon(
+    def _get_floor_settings(self, floor: int) -> Dict[str, Any]:
+        return dict(
+            floor=floor,
+            seed=self.seed,
+            map_width=self.map_width,
+            map_height=self.map_height,
             max_rooms=self.max_rooms,
             room_min_size=self.room_min_size,
             room_max_size=self.room_max_size,
-            map_width=self.map_width,
-            map_height=self.map_height,
-            engine=self.engine
+            generator=self.generator
         )
+
+    def _start_pregeneration(self, floor: int) -> None:
+        """Start generating the given floor in the background."""
+        result = _get_pregeneration_pool().apply_async(
+            _generate_floor, kwds=self._get_floor_settings(floor)
+        )
+        self._pregenerated_floor = floor, result
+
+    def _take_pregenerated_floor(self, floor: int) -> Optional[GameMap]:
+        """Return the pregenerated map of the given floor, or None if it is not ready.
+
+        A generation which is not finished is stopped, so the worker does not go on
+        building a floor which will not be used.
+        """
+        if self._pregenerated_floor is None:
+            return None
+
+        pregenerated_floor, result = self._pregenerated_floor
+        self._pregenerated_floor = None
+
+        if pregenerated_floor != floor or not result.ready():
+            _stop_pregeneration()
+            return None
+        if not result.successful():
+            return None
+
+        return result.get()
+
+    def _enter_floor(self, game_map: GameMap) -> None:
+        """Replace the placeholder player of a generated map with the real one and make it current."""
+        placeholder = game_map.engine.player
+        game_map.remove_entity(placeholder)
+
+        game_map.engine = self.engine
+        self.engine.player.place(placeholder.x, placeholder.y, game_map)
+
+        self.engine.game_map = game_map
+
+    @profiling.timed("generate_floor")
+    def generate_floor(self) -> None:
+        self.current_floor += 1
+
+        game_map = self._take_pregenerated_floor(self.current_floor)
+        if game_map is None:
+            # Not ready yet, so generate the same floor synchronously instead.
+            game_map = _generate_floor(**self._get_floor_settings(self.current_floor))
+
+        self._enter_floor(game_map)
+
+        if self.pregenerate:
+            self._start_pregeneration(self.current_floor + 1)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Play many games with a bot and without a window, for balancing and regression tests.
+
+Run from the repository root:
+
+    python headless.py --games 100 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import statistics
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+import tcod
+
+import actions
+from components.consumable import HealingConsumable
+from engine import Engine
+from entity import Actor, Item
+from equipment_types import EquipmentType
+import input_handlers
+import procgen
+import setup_game
+
+
+class Bot:
+    """
+    A simple player policy: heal when hurt, fight what it sees, pick up and equip
+    better gear, explore the floor and then take the stairs.
+    """
+
+    def __init__(self, *, floor_turns: int = 400):
+        # After this many turns on a floor the bot heads for the stairs even if unexplored.
+        self.floor_turns = floor_turns
+        self._floor: Optional[int] = None
+        self._floor_start = 0
+        # The rest of the path to the current exploration target.
+        self._path: List[Tuple[int, int]] = []
+
+    def decide(self, engine: Engine) -> actions.Action:
+        """Return the next action of the player."""
+        player = engine.player
+        game_map = engine.game_map
+
+        if engine.game_world.current_floor != self._floor:
+            self._floor = engine.game_world.current_floor
+            self._floor_start = engine.turn
+            self._path = []
+
+        enemies = [
+            actor
+            for actor in game_map.actors
+            if actor is not player and game_map.visible[actor.x, actor.y]
+        ]
+        nearest_enemy = min(
+            enemies, key=lambda actor: player.distance(actor.x, actor.y), default=None
+        )
+
+        if player.fighter.hp < player.fighter.max_hp // 2:
+            for item in player.inventory.items:
+                if isinstance(item.consumable, HealingConsumable):
+                    return actions.ItemAction(player, item)
+
+        if nearest_enemy:
+            dx = nearest_enemy.x - player.x
+            dy = nearest_enemy.y - player.y
+            if max(abs(dx), abs(dy)) <= 1:
+                return actions.MeleeAction(player, dx, dy)
+
+            for item in player.inventory.items:
+                if item.consumable and not isinstance(item.consumable, HealingConsumable):
+                    return actions.ItemAction(player, item, (nearest_enemy.x, nearest_enemy.y))
+
+        for item in player.inventory.items:
+            if self._is_upgrade(player, item):
+                return actions.EquipAction(player, item)
+
+        inventory_full = len(player.inventory.items) >= player.inventory.capacity
+        if not inventory_full and game_map.get_items_at_location(player.x, player.y):
+            return actions.PickupAction(player)
+
+        if (player.x, player.y) == game_map.downstairs_location and (
+            not self._has_unexplored(engine) or self._is_floor_over(engine)
+        ):
+            return actions.TakeStairsAction(player)
+
+        if nearest_enemy or not self._is_step_free(engine):
+            # Enemies move, so the path to them is computed again every turn.
+            self._path = []
+
+        if not self._path:
+            pathfinder = self._get_pathfinder(engine)
+            targets = np.zeros((game_map.width, game_map.height), dtype=bool)
+            if nearest_enemy:
+                targets[nearest_enemy.x, nearest_enemy.y] = True
+            elif not self._is_floor_over(engine):
+                targets |= game_map.tiles["walkable"] & ~game_map.explored
+                if not inventory_full:
+                    for item in game_map.items:
+                        targets[item.x, item.y] |= game_map.explored[item.x, item.y]
+
+            self._path = self._get_path(pathfinder, targets)
+            if not self._path:
+                targets[:] = False
+                targets[game_map.downstairs_location] = True
+                self._path = self._get_path(pathfinder, targets)
+            if not self._path:
+                return actions.WaitAction(player)
+
+        x, y = self._path.pop(0)
+        return actions.BumpAction(player, x - player.x, y - player.y)
+
+    def level_up(self, player: Actor) -> None:
+        """Pick a level up bonus, cycling through all of them."""
+        choice = player.level.current_level % 3
+        if choice == 0:
+            player.level.increase_max_hp()
+        elif choice == 1:
+            player.level.increase_power()
+        else:
+            player.level.increase_defense()
+
+    @staticmethod
+    def _is_upgrade(player: Actor, item: Item) -> bool:
+        """Return True if equipping the item raises the total bonus of its slot."""
+        if not item.equippable or player.equipment.item_is_equipped(item):
+            return False
+
+        current = (
+            player.equipment.weapon
+            if item.equippable.equipment_type == EquipmentType.WEAPON
+            else player.equipment.armor
+        )
+        if current is None or current.equippable is None:
+            return True
+
+        def bonus(equipped: Item) -> int:
+            assert equipped.equippable is not None
+            return equipped.equippable.power_bonus + equipped.equippable.defense_bonus
+
+        return bonus(item) > bonus(current)
+
+    def _is_floor_over(self, engine: Engine) -> bool:
+        return engine.turn - self._floor_start >= self.floor_turns
+
+    @staticmethod
+    def _has_unexplored(engine: Engine) -> bool:
+        game_map = engine.game_map
+        return bool((game_map.tiles["walkable"] & ~game_map.explored).any())
+
+    @staticmethod
+    def _get_pathfinder(engine: Engine) -> tcod.path.Pathfinder:
+        graph = tcod.path.SimpleGraph(
+            cost=engine.game_map.get_movement_cost(), cardinal=2, diagonal=3
+        )
+        pathfinder = tcod.path.Pathfinder(graph)
+        pathfinder.add_root((engine.player.x, engine.player.y))
+        pathfinder.resolve()
+        return pathfinder
+
+    def _is_step_free(self, engine: Engine) -> bool:
+        """Return True if the next step of the path is not blocked by an entity."""
+        return not self._path or not engine.game_map.get_blocking_entity_at_location(
+            *self._path[0]
+        )
+
+    @staticmethod
+    def _get_path(
+            pathfinder: tcod.path.Pathfinder, targets: np.ndarray
+    ) -> List[Tuple[int, int]]:
+        """Return the path to the nearest reachable tile in `targets`, without the start."""
+        unreachable = np.iinfo(pathfinder.distance.dtype).max
+        distance = np.where(targets & (pathfinder.distance > 0), pathfinder.distance, unreachable)
+
+        nearest = np.unravel_index(np.argmin(distance), distance.shape)
+        if distance[nearest] == unreachable:
+            return []
+
+        return [(x, y) for x, y in pathfinder.path_to(nearest)[1:].tolist()]
+
+
+def run_game(seed: int, max_turns: int = 2000, generator: Optional[str] = None) -> Dict[str, Any]:
+    """Play one game with the bot and return its outcome."""
+    engine = setup_game.new_game(pregenerate=False, seed=seed, generator=generator)
+    handler = input_handlers.MainGameEventHandler(engine)
+    bot = Bot()
+
+    start = time.perf_counter()
+    while engine.player.is_alive and engine.turn < max_turns:
+        # Impossible actions are reported to the message log and take no turn.
+        if not handler.handle_action(bot.decide(engine)):
+            handler.handle_action(actions.WaitAction(engine.player))
+
+        if engine.player.level.requires_level_up:
+            bot.level_up(engine.player)
+
+    return dict(
+        seed=seed,
+        turns=engine.turn,
+        seconds=time.perf_counter() - start,
+        died=not engine.player.is_alive,
+        floor=engine.game_world.current_floor,
+        level=engine.player.level.current_level,
+    )
+
+
+def _run_game(args: Tuple[int, int, Optional[str]]) -> Dict[str, Any]:
+    return run_game(*args)
+
+
+def run_games(
+        seeds: Iterable[int],
+        *,
+        max_turns: int = 2000,
+        generator: Optional[str] = None,
+        workers: int = 1
+) -> List[Dict[str, Any]]:
+    """Play a game for every seed, in `workers` processes, and return their outcomes."""
+    jobs = [(seed, max_turns, generator) for seed in seeds]
+
+    if workers <= 1:
+        return [_run_game(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_game, jobs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game.")
+    parser.add_argument("--max-turns", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--generator",
+        choices=sorted(procgen.generators),
+        help="Generate every floor with this generator instead of choosing by floor.",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_games(
+        range(args.seed, args.seed + args.games),
+        max_turns=args.max_turns,
+        generator=args.generator,
+        workers=args.workers,
+    )
+    elapsed = time.perf_counter() - start
+
+    turns = [result["turns"] for result in results]
+    floors = [result["floor"] for result in results]
+    levels = [result["level"] for result in results]
+    deaths = sum(result["died"] for result in results)
+    game_seconds = sum(result["seconds"] for result in results)
+
+    print(f"games:        {len(results)} in {elapsed:.1f}s")
+    print(
+        f"turns/second: {sum(turns) / elapsed:.0f} total,"
+        f" {sum(turns) / game_seconds:.0f} per worker"
+    )
+    print(f"deaths:       {deaths} ({deaths / len(results):.0%})")
+    print(f"turns:        mean {statistics.mean(turns):.0f}, max {max(turns)}")
+    print(f"floor:        mean {statistics.mean(floors):.1f}, max {max(floors)}")
+    print(f"level:        mean {statistics.mean(levels):.1f}, max {max(levels)}")
+
+
+if __name__ == "__main__":
+    main()
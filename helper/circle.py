@@ -1,10 +1,12 @@
 import tcod
 
+import functools
 import math
 from typing import Tuple
 
+import numpy as np  # type: ignore
+
 import color
-from helper.highlight import highlight
 
 
 def is_in(
@@ -21,6 +23,43 @@ def is_in(
     return distance <= radius + 0.5
 
 
+@functools.lru_cache(maxsize=None)
+def get_disk(radius: int) -> np.ndarray:
+    """
+    Return a read-only boolean mask of the tiles is_in `radius` of the middle of
+    a square with sides of 2 * radius + 1.  Masks are cached by radius.
+    """
+    offsets = np.arange(-radius, radius + 1)
+    disk = offsets[:, np.newaxis] ** 2 + offsets[np.newaxis, :] ** 2 <= (radius + 0.5) ** 2
+    disk.flags.writeable = False
+
+    return disk
+
+
+def clip_disk(
+        center_xy: Tuple[int, int],
+        radius: int,
+        shape: Tuple[int, int]
+) -> Tuple[Tuple[slice, slice], np.ndarray]:
+    """
+    Return the part of the circle around `center_xy` which lies inside an array of
+    `shape`, as a 2D index into the array and the matching part of get_disk.
+    """
+    center_x, center_y = center_xy
+    width, height = shape
+
+    x1, x2 = max(center_x - radius, 0), min(center_x + radius + 1, width)
+    y1, y2 = max(center_y - radius, 0), min(center_y + radius + 1, height)
+    x1, y1 = min(x1, x2), min(y1, y2)  # Empty when the circle is entirely outside.
+
+    disk = get_disk(radius)[
+        x1 - center_x + radius:x2 - center_x + radius,
+        y1 - center_y + radius:y2 - center_y + radius,
+    ]
+
+    return (slice(x1, x2), slice(y1, y2)), disk
+
+
 def draw_circle(
         console: tcod.Console,
         center_xy: Tuple[int, int],
@@ -30,12 +69,8 @@ def draw_circle(
         bg: Tuple[int, int, int] = color.white
 
 ) -> None:
-    center_x, center_y = center_xy
-
-    for i in range(-radius, radius + 1):
-        for j in range(-radius, radius + 1):
-            target_xy = (center_x + i, center_y + j)
+    window, disk = clip_disk(center_xy, radius, console.tiles_rgb.shape)
 
-            if is_in(center_xy=center_xy, radius=radius, target_xy=target_xy):
-                highlight(console, target_xy, fg=fg, bg=bg)
-                
\ No newline at end of file
+    tiles = console.tiles_rgb[window]
+    tiles["bg"][disk] = bg
+    tiles["fg"][disk] = fg
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import os
-
 from typing import Callable, Optional, Tuple, TYPE_CHECKING, Union
 
 import tcod
@@ -17,6 +15,8 @@ import color
 import exceptions
 from helper.circle import draw_circle
 from helper.highlight import highlight
+import profiling
+import savegame
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -135,6 +135,7 @@ class EventHandler(BaseEventHandler):
             return MainGameEventHandler(self.engine)  # Return to the main handler.
         return self
 
+    @profiling.timed("handle_action")
     def handle_action(self, action: Optional[Action]) -> bool:
         """Handle actions returned from event methods.
 
@@ -149,6 +150,7 @@ class EventHandler(BaseEventHandler):
             self.engine.message_log.add_message(exc.args[0], color.impossible)
             return False  # Skip enemy turn on exceptions.
 
+        self.engine.turn += 1
         self.engine.handle_enemy_turns()
 
         self.engine.update_fov()
@@ -543,8 +545,7 @@ class MainGameEventHandler(EventHandler):
 class GameOverEventHandler(EventHandler):
     def on_quit(self) -> None:
         """Handle exiting out of a finished game."""
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav")  # Deletes the active save file.
+        savegame.remove("savegame.sav")  # Deletes the active save file and its autosaves.
         raise exceptions.QuitWithoutSaving()  # Avoid saving a finished game.
 
     def ev_quit(self, event: tcod.event.Quit) -> None:
@@ -568,7 +569,9 @@ class HistoryViewer(EventHandler):
 
     def __init__(self, engine: Engine):
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        # The cursor counts from the oldest message which can still be read.
+        self.log_start = engine.message_log.history_start
+        self.log_length = engine.message_log.total_count - self.log_start
         self.cursor = self.log_length - 1
 
     def on_render(self, console: tcod.Console) -> None:
@@ -583,13 +586,15 @@ class HistoryViewer(EventHandler):
         )
 
         # Render the message log using the cursor parameter.
+        # Every message takes at least one line, so only one page of messages is read.
+        stop = self.log_start + self.cursor + 1
         self.engine.message_log.render_messages(
             log_console,
             1,
             1,
             log_console.width - 2,
             log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+            self.engine.message_log.get_messages(stop - (log_console.height - 2), stop),
         )
         log_console.blit(console, 3, 3)
 
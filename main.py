@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
+import argparse
+import time
 import traceback
+from typing import Iterable, List
 
 import tcod
 
 import color
 import exceptions
 import input_handlers
+import procgen
+import profiling
+import savegame
 import setup_game
 from tileset import TilesetFactory
 
@@ -17,11 +23,104 @@ def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
         print("Game saved.")
 
 
+def autosave_game(handler: input_handlers.BaseEventHandler, autosave: savegame.Autosave) -> None:
+    """
+    If the current event handler has an Engine with a living player then autosave it.
+
+    A failed autosave is reported in the message log, the game goes on without it.
+    """
+    if isinstance(handler, input_handlers.EventHandler) and handler.engine.player.is_alive:
+        try:
+            autosave.update(handler.engine)
+        except OSError as exc:
+            traceback.print_exc()  # Print error to stderr.
+            handler.engine.message_log.add_message(f"Autosave failed: {exc}", color.error)
+
+
+# Frames are rendered at most this often, however fast events come in.
+MAX_FPS = 60
+
+# Toggles profiling and its overlay.
+PROFILING_KEY = tcod.event.K_F3
+
+# Key repeats handled per batch of events, the rest are dropped so they do not pile up.
+MAX_KEY_REPEATS = 2
+
+
+class FramePacer:
+    """Limits rendering to `max_fps` frames per second and counts the frames it skips."""
+
+    def __init__(self, max_fps: float):
+        self.frame_time = 1 / max_fps
+        self.next_frame_time = 0.0
+        # Frames asked for while another one was still waiting to be rendered.
+        self.skipped_frames = 0
+
+    def get_timeout(self) -> float:
+        """Return the seconds until the next frame may be rendered."""
+        return max(0.0, self.next_frame_time - time.perf_counter())
+
+    def start_frame(self) -> bool:
+        """Return True and start a frame if one may be rendered now."""
+        now = time.perf_counter()
+        if now < self.next_frame_time:
+            return False
+
+        self.next_frame_time = now + self.frame_time
+        return True
+
+
+def coalesce_events(
+        events: Iterable[tcod.event.Event], max_key_repeats: int = MAX_KEY_REPEATS
+) -> List[tcod.event.Event]:
+    """
+    Return the events worth handling: only the last of consecutive mouse motions,
+    and at most `max_key_repeats` key repeats.
+    """
+    coalesced: List[tcod.event.Event] = []
+    key_repeats = 0
+
+    for event in events:
+        if isinstance(event, tcod.event.KeyDown) and event.repeat:
+            key_repeats += 1
+            if key_repeats > max_key_repeats:
+                continue
+        elif (
+            isinstance(event, tcod.event.MouseMotion)
+            and coalesced
+            and isinstance(coalesced[-1], tcod.event.MouseMotion)
+        ):
+            coalesced.pop()
+
+        coalesced.append(event)
+
+    return coalesced
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Caverns of Green Hill")
+    parser.add_argument(
+        "--generator",
+        choices=sorted(procgen.generators),
+        help="Generate every floor of a new game with this generator.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Start with profiling and its overlay enabled, F3 toggles them.",
+    )
+    parser.add_argument(
+        "--profile-dump", metavar="FILE", help="Write the profiling timings to FILE on exit."
+    )
+    args = parser.parse_args()
+
+    profiling.enabled = args.profile
+
     screen_width = 80
     screen_height = 50
 
-    handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
+    handler: input_handlers.BaseEventHandler = setup_game.MainMenu(generator=args.generator)
+    autosave = savegame.Autosave("savegame.sav")
 
     with tcod.context.new_terminal(
             screen_width,
@@ -32,23 +131,61 @@ def main() -> None:
     ) as context:
         root_console = tcod.Console(screen_width, screen_height, order="F")
 
+        # Frames are only rendered after events which can change the screen,
+        # and no more often than the frame pacer allows.
+        frame_pacer = FramePacer(MAX_FPS)
+        redraw = True
+        mouse_tile = (-1, -1)
+
         try:
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                if redraw and frame_pacer.start_frame():
+                    root_console.clear()
+                    handler.on_render(console=root_console)
+                    if profiling.enabled:
+                        profiling.render_overlay(
+                            root_console,
+                            x=0,
+                            y=0,
+                            extra_lines=(f"frames skipped: {frame_pacer.skipped_frames}",),
+                        )
+                    context.present(root_console)
+                    redraw = False
+
+                # A pending frame is rendered once it is due, even without new events.
+                timeout = frame_pacer.get_timeout() if redraw else None
+                changed = False
 
                 try:
-                    for event in tcod.event.wait():
+                    for event in coalesce_events(tcod.event.wait(timeout)):
                         context.convert_event(event)
-                        handler = handler.handle_events(event)
+                        if isinstance(event, tcod.event.MouseMotion):
+                            # Moving the mouse within a tile changes nothing on the screen.
+                            tile = (int(event.tile.x), int(event.tile.y))
+                            changed = changed or tile != mouse_tile
+                            mouse_tile = tile
+                        else:
+                            changed = True
+
+                        if isinstance(event, tcod.event.KeyDown) and event.sym == PROFILING_KEY:
+                            profiling.enabled = not profiling.enabled
+                        else:
+                            handler = handler.handle_events(event)
                 except Exception:  # Handle exceptions in game.
+                    changed = True
                     traceback.print_exc()  # Print error to stderr.
                     # Then print the error to the message log.
                     if isinstance(handler, input_handlers.EventHandler):
                         handler.engine.message_log.add_message(
                             traceback.format_exc(), color.error
                         )
+
+                if changed:
+                    if redraw:
+                        frame_pacer.skipped_frames += 1
+                    redraw = True
+
+                autosave_game(handler, autosave)
         except exceptions.QuitWithoutSaving:
             raise
         except SystemExit:  # Save and quit.
@@ -57,6 +194,9 @@ def main() -> None:
         except BaseException:  # Save on any other unexpected exception.
             save_game(handler, "savegame.sav")
             raise
+        finally:
+            if args.profile_dump:
+                profiling.dump(args.profile_dump)
 
 
 if __name__ == "__main__":
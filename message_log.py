@@ -1,4 +1,8 @@
-from typing import Iterable, List, Reversible, Tuple
+from array import array
+from collections import deque
+import json
+import os
+from typing import Any, Deque, Dict, Iterable, List, Optional, Reversible, Tuple
 import textwrap
 
 import tcod
@@ -11,6 +15,8 @@ class Message:
         self.plain_text = text
         self.fg = fg
         self.count = 1
+        # Wrapped lines of the full text by width, with the count they were wrapped for.
+        self._wrapped: Dict[int, Tuple[int, List[str]]] = {}
 
     @property
     def full_text(self) -> str:
@@ -19,10 +25,95 @@ class Message:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
 
+    def wrapped(self, width: int) -> List[str]:
+        """Return the full text wrapped to `width`, cached until the count changes."""
+        count, lines = self._wrapped.get(width, (0, []))
+        if count != self.count:
+            lines = list(MessageLog.wrap(self.full_text, width))
+            self._wrapped[width] = self.count, lines
+        return lines
+
+
+class MessageArchive:
+    """Keeps the messages which dropped out of a MessageLog in a file, and reads them back on demand."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        # The file offset of each archived message, followed by the end of the last one.
+        self._offsets = array("Q", [0])
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def append(self, message: Message) -> None:
+        record = json.dumps([message.plain_text, message.fg, message.count]) + "\n"
+        data = record.encode()
+
+        # Anything after the last archived message is left over from an unsaved session.
+        with open(self.filename, "r+b" if os.path.exists(self.filename) else "wb") as f:
+            f.seek(self._offsets[-1])
+            f.write(data)
+            f.truncate()
+
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def restore(self, length: int) -> None:
+        """Index the messages archived to the file after this was saved, up to `length` in all."""
+        if length <= len(self):
+            return
+
+        with open(self.filename, "rb") as f:
+            f.seek(self._offsets[-1])
+            while len(self) < length:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    raise ValueError(f"{self.filename} ends after {len(self)} messages.")
+                self._offsets.append(self._offsets[-1] + len(line))
+
+    def read(self, start: int, stop: int) -> List[Message]:
+        """Return the archived messages from index `start` up to, but not including, `stop`."""
+        if start >= stop:
+            return []
+
+        with open(self.filename, "rb") as f:
+            f.seek(self._offsets[start])
+            data = f.read(self._offsets[stop] - self._offsets[start])
+
+        messages = []
+        for line in data.decode().splitlines():
+            text, fg, count = json.loads(line)
+            message = Message(text, tuple(fg))
+            message.count = count
+            messages.append(message)
+
+        return messages
+
 
 class MessageLog:
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    def __init__(self, capacity: int = 1000, archive: Optional[MessageArchive] = None) -> None:
+        """Keep the latest `capacity` messages.
+
+        Older messages are moved to `archive` if one is given, otherwise they are dropped.
+        """
+        self.capacity = capacity
+        self.messages: Deque[Message] = deque(maxlen=capacity)
+        self.archive = archive
+        self.first_index = 0  # The index of messages[0] among all messages ever added.
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # Save games store the messages as a plain list.
+        self.messages = deque(self.messages, maxlen=self.capacity)
+
+    @property
+    def total_count(self) -> int:
+        """The number of messages ever added to this log."""
+        return self.first_index + len(self.messages)
+
+    @property
+    def history_start(self) -> int:
+        """The index of the oldest message which can still be read."""
+        return 0 if self.archive is not None else self.first_index
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True,
@@ -34,8 +125,32 @@ class MessageLog:
         """
         if stack and self.messages and text == self.messages[-1].plain_text:
             self.messages[-1].count += 1
-        else:
-            self.messages.append(Message(text, fg))
+            return
+
+        if len(self.messages) == self.capacity:
+            # The oldest message is about to drop out of the buffer.
+            if self.archive is not None:
+                self.archive.append(self.messages[0])
+            self.first_index += 1
+
+        self.messages.append(Message(text, fg))
+
+    def get_messages(self, start: int, stop: int) -> List[Message]:
+        """Return the messages from index `start` up to, but not including, `stop`.
+
+        Messages before history_start are skipped, archived ones are read from disk.
+        """
+        start = max(start, self.history_start)
+        stop = min(stop, self.total_count)
+
+        messages: List[Message] = []
+        if self.archive is not None and start < self.first_index:
+            messages += self.archive.read(start, min(stop, self.first_index))
+
+        for index in range(max(start, self.first_index), stop):
+            messages.append(self.messages[index - self.first_index])
+
+        return messages
 
     def render(
         self, console: tcod.Console, x: int, y: int, width: int, height: int,
@@ -71,7 +186,7 @@ class MessageLog:
         y_offset = height - 1
 
         for message in reversed(messages):
-            for line in reversed(list(cls.wrap(message.full_text, width))):
+            for line in reversed(message.wrapped(width)):
                 console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
                 y_offset -= 1
                 if y_offset < 0:
@@ -1,78 +1,125 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import random
+from typing import Dict, NamedTuple, Optional, Tuple, Type, TYPE_CHECKING
 
+from dungeon.base_dungeon_generator import BaseDungeonGenerator
 from dungeon.bsp import BSP
+from dungeon.constants import generator_by_floor, get_max_value_for_floor
 from dungeon.diffusion_limited_aggregation import DiffusionLimitedAggregation
 from dungeon.diffusion_limited_aggregation_2 import DiffusionLimitedAggregation2
 from dungeon.drunkards_walk import DrunkardsWalk
 from dungeon.simple import Simple
 from dungeon.simple_labyrinth import SimpleLabyrinth
-from game_map import GameMap
+from exceptions import GenerationBudgetExceeded
+from game_map import GameMap, get_floor_rng
 
 
 if TYPE_CHECKING:
     from engine import Engine
 
 
-def generate_dungeon(
+class GeneratorEntry(NamedTuple):
+    """A dungeon generator which can be selected by name."""
+
+    generator_class: Type[BaseDungeonGenerator]
+    # The room settings the generator takes, besides the map size, engine and rng.
+    room_settings: Tuple[str, ...] = ()
+    # Iterations of the generator's main loop after which generation is given up for
+    # the fallback generator.
+    # The fallback draws from a stream of its own, so a seed still gives one of a
+    # fixed set of floors: one per generator in the chain of fallbacks.
+    budget: Optional[int] = None
+    fallback: Optional[str] = None
+
+
+generators: Dict[str, GeneratorEntry] = {
+    "simple": GeneratorEntry(Simple, ("max_rooms", "room_min_size", "room_max_size")),
+    "bsp": GeneratorEntry(BSP, ("room_min_size", "room_max_size")),
+    "simple_labyrinth": GeneratorEntry(SimpleLabyrinth, ("room_min_size",)),
+    # The budgets are about five times the most iterations seen on 80x43 maps.
+    "drunkards_walk": GeneratorEntry(DrunkardsWalk, budget=3_000, fallback="simple"),
+    "diffusion_limited_aggregation": GeneratorEntry(
+        DiffusionLimitedAggregation, budget=30_000, fallback="drunkards_walk"
+    ),
+    "diffusion_limited_aggregation_2": GeneratorEntry(
+        DiffusionLimitedAggregation2, budget=60_000, fallback="diffusion_limited_aggregation"
+    ),
+}
+
+
+def create_generator(
+    name: str,
+    *,
     max_rooms: int,
     room_min_size: int,
     room_max_size: int,
     map_width: int,
     map_height: int,
-    engine: Engine
-) -> GameMap:
-    """
-    generator = Simple(
-        max_rooms=max_rooms,
-        room_min_size=room_min_size,
-        room_max_size=room_max_size,
-        map_width=map_width,
-        map_height=map_height,
-        engine=engine
+    engine: Engine,
+    rng: random.Random
+) -> BaseDungeonGenerator:
+    """Return the generator registered as `name`, without an iteration budget."""
+    entry = generators[name]
+    room_settings = dict(
+        max_rooms=max_rooms, room_min_size=room_min_size, room_max_size=room_max_size
     )
-    """
 
-    """
-    generator = BSP(
-        room_min_size=room_min_size,
-        room_max_size=room_max_size,
+    return entry.generator_class(  # type: ignore
         map_width=map_width,
         map_height=map_height,
-        engine=engine
+        engine=engine,
+        rng=rng,
+        **{setting: room_settings[setting] for setting in entry.room_settings}
     )
-    """
 
-    """
-    generator = SimpleLabyrinth(
-        room_min_size=room_min_size,
-        map_width=map_width,
-        map_height=map_height,
-        engine=engine
-    )
-    """
 
-    """
-    generator = DrunkardsWalk(
-        map_width=map_width,
-        map_height=map_height,
-        engine=engine
-    )
-    """
+def get_generator_name(floor: int) -> str:
+    """Return the name of the generator for the given floor, from generator_by_floor."""
+    # Floors before the first entry use its generator.
+    return get_max_value_for_floor(generator_by_floor, floor, default=generator_by_floor[0][1])
 
+
+def generate_dungeon(
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    engine: Engine,
+    rng: random.Random,
+    generator: Optional[str] = None
+) -> GameMap:
     """
-    generator = DiffusionLimitedAggregation(
-        map_width=map_width,
-        map_height=map_height,
-        engine=engine
-    )
+    Generate the current floor of the engine's game world.
+
+    The generator named `generator` is used if given, otherwise the one for the
+    floor.  A generator which exceeds its iteration budget is replaced by its fallback,
+    which draws from its own stream of the game world's seed instead of from `rng`.
     """
+    name = generator or get_generator_name(engine.game_world.current_floor)
 
-    generator = DiffusionLimitedAggregation2(
-        map_width=map_width,
-        map_height=map_height,
-        engine=engine
-    )
+    while True:
+        entry = generators[name]
+        dungeon_generator = create_generator(
+            name,
+            max_rooms=max_rooms,
+            room_min_size=room_min_size,
+            room_max_size=room_max_size,
+            map_width=map_width,
+            map_height=map_height,
+            engine=engine,
+            rng=rng
+        )
+
+        if entry.budget is not None and entry.fallback is not None:
+            dungeon_generator.max_iterations = entry.budget
 
-    return generator.generate_dungeon()
+        try:
+            return dungeon_generator.generate_dungeon()
+        except GenerationBudgetExceeded:
+            assert entry.fallback is not None
+            name = entry.fallback
+            # How much of `rng` was used depends on how far the given up generator got.
+            game_world = engine.game_world
+            rng = get_floor_rng(game_world.seed, game_world.current_floor, name)
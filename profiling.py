@@ -0,0 +1,160 @@
+"""Time the subsystems of a turn, for finding out where turn time goes.
+
+Timings are only taken while `enabled` is True.  Every timed subsystem keeps its
+latest samples in a RollingHistogram, which can be drawn over the game with
+render_overlay or written to a file with dump.
+
+Timed functions are wrapped with timed, other blocks of code with timing.
+While profiling is disabled, either costs a single check of `enabled`.
+"""
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+import functools
+import json
+import time
+from typing import Any, Callable, Deque, Dict, Iterator, List, Tuple, TypeVar, TYPE_CHECKING
+
+import color
+
+if TYPE_CHECKING:
+    from tcod import Console
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+enabled = False
+
+# The upper bounds in seconds of the histogram buckets, the last bucket has no bound.
+BUCKET_BOUNDS = tuple(0.0001 * 2 ** exponent for exponent in range(14))
+
+
+class RollingHistogram:
+    """The latest `window` samples of a timing, in seconds."""
+
+    def __init__(self, window: int = 600):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.total_count = 0  # The number of samples ever added.
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.total_count += 1
+
+    def get_percentile(self, percentile: float) -> float:
+        """Return the sample at `percentile`, between 0 and 100, of the window."""
+        if not self.samples:
+            return 0.0
+
+        ordered = sorted(self.samples)
+        return ordered[round(percentile / 100 * (len(ordered) - 1))]
+
+    def get_bucket_counts(self) -> List[int]:
+        """Return the number of samples in the window per bucket of BUCKET_BOUNDS."""
+        counts = [0] * (len(BUCKET_BOUNDS) + 1)
+
+        for sample in self.samples:
+            bucket = 0
+            while bucket < len(BUCKET_BOUNDS) and sample > BUCKET_BOUNDS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+
+        return counts
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Return the statistics of the window, in seconds."""
+        return dict(
+            total_count=self.total_count,
+            count=len(self.samples),
+            mean=sum(self.samples) / len(self.samples) if self.samples else 0.0,
+            median=self.get_percentile(50),
+            p95=self.get_percentile(95),
+            max=max(self.samples, default=0.0),
+        )
+
+
+histograms: Dict[str, RollingHistogram] = {}
+
+
+def record(name: str, seconds: float) -> None:
+    """Add a sample to the histogram `name`."""
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = RollingHistogram()
+
+    histogram.add(seconds)
+
+
+def reset() -> None:
+    """Forget all samples."""
+    histograms.clear()
+
+
+@contextmanager
+def timing(name: str) -> Iterator[None]:
+    """Time the block into the histogram `name`, if profiling is enabled."""
+    if not enabled:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Time the calls of the decorated function into the histogram `name`, if enabled."""
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not enabled:
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def get_overlay_lines() -> List[str]:
+    """Return the lines of the overlay: the statistics of every histogram in milliseconds."""
+    lines = [f"{'ms':<24}{'n':>6}{'mean':>7}{'p50':>7}{'p95':>7}{'max':>7}"]
+
+    for name, histogram in sorted(histograms.items()):
+        summary = histogram.get_summary()
+        lines.append(
+            f"{name[:24]:<24}{summary['count']:>6}"
+            + "".join(f"{summary[key] * 1000:>7.2f}" for key in ("mean", "median", "p95", "max"))
+        )
+
+    return lines
+
+
+def render_overlay(console: Console, x: int, y: int, extra_lines: Tuple[str, ...] = ()) -> None:
+    """Render the timings, followed by `extra_lines`, with the top left corner at x, y."""
+    for offset, line in enumerate(get_overlay_lines() + list(extra_lines)):
+        console.print(x=x, y=y + offset, string=line, fg=color.white, bg=color.black)
+
+
+def dump(filename: str) -> None:
+    """Write the statistics and bucket counts of every histogram to a JSON file."""
+    with open(filename, "w") as f:
+        json.dump(
+            dict(
+                bucket_bounds=BUCKET_BOUNDS,
+                histograms={
+                    name: dict(
+                        histogram.get_summary(), bucket_counts=histogram.get_bucket_counts()
+                    )
+                    for name, histogram in sorted(histograms.items())
+                },
+            ),
+            f,
+            indent=2,
+        )
@@ -0,0 +1,723 @@
+"""Read and write save games in a structured, compressed format.
+
+A save file starts with a small header naming the compressor, followed by the
+compressed sections:
+
+* "engine": the Engine pickled without the arrays of the current GameMap, without
+  the messages of the MessageLog and with its entities as references to their records,
+* "entities": a compact record of every entity on the current GameMap and in the
+  inventories of its actors, see encode_entity,
+* "tiles": the raw buffer of GameMap.tiles,
+* "visible" and "explored": the bit-packed boolean arrays of the GameMap,
+* "messages": the message log as compact (text, color, count) records.
+
+Files written by older versions, an LZMA compressed pickle of the Engine, are
+rejected as incompatible: the Engine has changed too much since to restore them.
+
+Autosave keeps such a file as a base snapshot and appends the changes made
+since then to a delta log next to it, see Autosave.
+"""
+from __future__ import annotations
+
+import io
+import lzma
+import os
+import pickle
+import struct
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+import zlib
+
+import numpy as np  # type: ignore
+
+from components.ai import BaseAI, ConfusedEnemy, HostileEnemy
+from entity import Actor, Entity
+from message_log import Message, MessageLog
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+MAGIC = b"CGHSAVE\0"
+DELTA_MAGIC = b"CGHDELT\0"
+VERSION = 1
+
+DELTA_SUFFIX = ".delta"
+"""Appended to the name of a save file to get the name of its delta log."""
+MESSAGES_SUFFIX = ".messages"
+"""Appended to the name of a save file to get the name of the MessageArchive of its game."""
+
+_HEADER = struct.Struct("<8sHBB")  # Magic, version, compressor id, compression level.
+_SECTION_HEADER = struct.Struct("<BQ")  # Name length, data length.
+_SHAPE = struct.Struct("<II")
+_DELTA_RECORD_HEADER = struct.Struct("<I")  # Compressed record length.
+_TOKEN_LENGTH = 16
+
+COMPRESSORS: Dict[str, int] = {"none": 0, "zlib": 1, "lzma": 2}
+"""The available compressors and their id in the file header."""
+
+
+def _compress(data: bytes, compressor: str, level: int) -> bytes:
+    if compressor == "zlib":
+        return zlib.compress(data, level)
+    elif compressor == "lzma":
+        return lzma.compress(data, preset=level)
+    return data
+
+
+def _decompress(data: bytes, compressor_id: int) -> bytes:
+    if compressor_id == COMPRESSORS["zlib"]:
+        return zlib.decompress(data)
+    elif compressor_id == COMPRESSORS["lzma"]:
+        return lzma.decompress(data)
+    return data
+
+
+def encode_array(array: np.ndarray) -> bytes:
+    """Return the raw buffer of an array, with a header describing its dtype and shape."""
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode_array(data: bytes) -> np.ndarray:
+    return np.lib.format.read_array(io.BytesIO(data), allow_pickle=False)
+
+
+def encode_bits(array: np.ndarray) -> bytes:
+    """Return a 2D boolean array packed into bits, with its shape."""
+    return _SHAPE.pack(*array.shape) + np.packbits(array.ravel(order="F")).tobytes()
+
+
+def decode_bits(data: bytes) -> np.ndarray:
+    width, height = _SHAPE.unpack_from(data)
+    bits = np.unpackbits(
+        np.frombuffer(data, dtype=np.uint8, offset=_SHAPE.size), count=width * height
+    )
+    return bits.astype(bool).reshape((width, height), order="F")
+
+
+def encode_messages(messages: Iterable[Message]) -> bytes:
+    records = [(message.plain_text, message.fg, message.count) for message in messages]
+    return pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_messages(data: bytes) -> List[Message]:
+    messages = []
+
+    for text, fg, count in pickle.loads(data):
+        message = Message(text, fg)
+        message.count = count
+        messages.append(message)
+
+    return messages
+
+
+def _encode_ai(ai: Optional[BaseAI]) -> Any:
+    if ai is None:
+        return None
+    elif isinstance(ai, ConfusedEnemy):
+        return "ConfusedEnemy", ai.turns_remaining, _encode_ai(ai.previous_ai)
+    elif isinstance(ai, HostileEnemy):
+        return "HostileEnemy", tuple(ai.path)
+    raise TypeError(f"Cannot save the AI {type(ai).__name__}.")
+
+
+def _decode_ai(actor: Actor, record: Any) -> Optional[BaseAI]:
+    if record is None:
+        return None
+    elif record[0] == "ConfusedEnemy":
+        _, turns_remaining, previous_ai = record
+        return ConfusedEnemy(actor, _decode_ai(actor, previous_ai), turns_remaining)
+    elif record[0] == "HostileEnemy":
+        ai = HostileEnemy(actor)
+        ai.path = list(record[1])
+        return ai
+    raise ValueError(f"Unknown AI {record[0]} in save.")
+
+
+def get_entity_numbers(game_map: GameMap) -> Dict[Entity, int]:
+    """Number the entities on a map, followed by the items in the inventories of its actors."""
+    numbers = {entity: number for number, entity in enumerate(game_map.entities)}
+
+    for entity in game_map.entities:
+        if isinstance(entity, Actor):
+            for item in entity.inventory.items:
+                numbers[item] = len(numbers)
+
+    return numbers
+
+
+def encode_entity(entity: Entity, numbers: Dict[Entity, int]) -> Tuple[Any, ...]:
+    """
+    Return the compact record of an entity: the name of its prototype, its location
+    and, for actors, what can differ from the prototype while playing.
+
+    Other entities are referred to by their `numbers`.
+    """
+    if not isinstance(entity, Actor):
+        return entity.prototype_name, entity.x, entity.y
+
+    fighter, level, equipment = entity.fighter, entity.level, entity.equipment
+    return (
+        entity.prototype_name,
+        entity.x,
+        entity.y,
+        _encode_ai(entity.ai),
+        fighter.hp,
+        fighter.max_hp,
+        fighter.base_defense,
+        fighter.base_power,
+        level.current_level,
+        level.current_xp,
+        tuple(numbers[item] for item in entity.inventory.items),
+        numbers[equipment.weapon] if equipment.weapon is not None else None,
+        numbers[equipment.armor] if equipment.armor is not None else None,
+    )
+
+
+def create_entity(record: Tuple[Any, ...]) -> Entity:
+    """Return a clone of the prototype of a record, to apply the record to with apply_record."""
+    # Imported on first use, as the prototypes import the input handlers, which import this.
+    from entity_factories import prototypes
+
+    return prototypes[record[0]].clone()
+
+
+def apply_record(entity: Entity, record: Tuple[Any, ...], entities: List[Entity]) -> None:
+    """Bring an entity to the state of its record, with `entities` by their numbers."""
+    entity.x, entity.y = record[1], record[2]
+    if not isinstance(entity, Actor):
+        return
+
+    (
+        _, _, _, ai, hp, max_hp, base_defense, base_power, current_level, current_xp,
+        items, weapon, armor
+    ) = record
+
+    if ai is None:
+        if entity.ai is not None:
+            entity.become_corpse()
+    else:
+        entity.ai = _decode_ai(entity, ai)
+
+    # Dead actors have no AI by now, so an hp of 0 does not let them die again.
+    entity.fighter.max_hp = max_hp
+    entity.fighter.hp = hp
+    entity.fighter.base_defense = base_defense
+    entity.fighter.base_power = base_power
+
+    entity.level.current_level = current_level
+    entity.level.current_xp = current_xp
+
+    entity.inventory.items = [entities[number] for number in items]
+    for item in entity.inventory.items:
+        item.parent = entity.inventory
+
+    entity.equipment.weapon = entities[weapon] if weapon is not None else None
+    entity.equipment.armor = entities[armor] if armor is not None else None
+
+
+def encode_entities(numbers: Dict[Entity, int]) -> bytes:
+    """Return the records of the numbered entities, in the order of their numbers."""
+    records = [encode_entity(entity, numbers) for entity in numbers]
+    return pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_entities(data: bytes) -> List[Entity]:
+    """Return the entities of their records, by number, without a parent unless they are held."""
+    records = pickle.loads(data)
+    entities = [create_entity(record) for record in records]
+
+    for entity, record in zip(entities, records):
+        apply_record(entity, record, entities)
+
+    return entities
+
+
+_DECODERS: Dict[str, Callable[[bytes], Any]] = {
+    "tiles": decode_array,
+    "visible": decode_bits,
+    "explored": decode_bits,
+    "messages": decode_messages,
+}
+
+
+def _external_object(name: str) -> Any:
+    """Stands in for an object which is stored in its own section, see _EngineUnpickler."""
+    raise pickle.UnpicklingError(f"The {name} section must be loaded with the engine.")
+
+
+class _External:
+    """Pickles as a reference to the section `name`."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __reduce__(self) -> Any:
+        return _external_object, (self.name,)
+
+
+def _external_objects(engine: Engine) -> Dict[str, Any]:
+    """Return the objects of an Engine which are stored in their own sections."""
+    return {
+        "tiles": engine.game_map.tiles,
+        "visible": engine.game_map.visible,
+        "explored": engine.game_map.explored,
+        "messages": engine.message_log.messages,
+    }
+
+
+class _EnginePickler(pickle.Pickler):
+    """Pickles the entities of an Engine as their numbers."""
+
+    def __init__(self, file: io.BytesIO, numbers: Dict[Entity, int]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._numbers = numbers
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        if isinstance(obj, Entity):
+            return self._numbers[obj]
+        return None
+
+
+def _pickle_engine(engine: Engine, numbers: Dict[Entity, int]) -> bytes:
+    """Pickle an Engine, with references in place of the objects stored in their own sections.
+
+    The references to sections are made by reducers in the dispatch table of the
+    pickler, which only run for arrays and the message log.  Entities are referred
+    to by their `numbers`.
+    """
+    external_names = {id(obj): name for name, obj in _external_objects(engine).items()}
+
+    def reduce_array(array: np.ndarray) -> Any:
+        name = external_names.get(id(array))
+        if name is None:
+            return array.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+        return _external_object, (name,)
+
+    def reduce_message_log(message_log: MessageLog) -> Any:
+        state = message_log.__dict__.copy()
+        state["messages"] = _External("messages")
+        return MessageLog.__new__, (MessageLog,), state
+
+    engine_data = io.BytesIO()
+    pickler = _EnginePickler(engine_data, numbers)
+    pickler.dispatch_table = {np.ndarray: reduce_array, MessageLog: reduce_message_log}
+    pickler.dump(engine)
+    return engine_data.getvalue()
+
+
+class _EngineUnpickler(pickle.Unpickler):
+    """
+    Unpickles an Engine, resolving the references to sections with the `external`
+    objects and the numbers of entities with the `entities`.
+    """
+
+    def __init__(self, file: io.BytesIO, external: Dict[str, Any], entities: List[Entity]):
+        super().__init__(file)
+        self._external = external
+        self._entities = entities
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module == __name__ and name == _external_object.__name__:
+            return self._external.__getitem__
+        return super().find_class(module, name)
+
+    def persistent_load(self, number: int) -> Entity:
+        return self._entities[number]
+
+
+def _unpickle_engine(data: bytes, external: Dict[str, Any], entities: List[Entity]) -> Engine:
+    return _EngineUnpickler(io.BytesIO(data), external, entities).load()
+
+
+def dump_sections(engine: Engine) -> Dict[str, bytes]:
+    """Return the encoded sections of an Engine."""
+    game_map = engine.game_map
+    numbers = get_entity_numbers(game_map)
+
+    return {
+        "engine": _pickle_engine(engine, numbers),
+        "entities": encode_entities(numbers),
+        "tiles": encode_array(game_map.tiles),
+        "visible": encode_bits(game_map.visible),
+        "explored": encode_bits(game_map.explored),
+        "messages": encode_messages(engine.message_log.messages),
+    }
+
+
+def _decode_external(sections: Dict[str, bytes]) -> Dict[str, Any]:
+    return {name: decoder(sections[name]) for name, decoder in _DECODERS.items()}
+
+
+def _load_sections(sections: Dict[str, bytes]) -> Tuple[Engine, List[Entity]]:
+    """Return the Engine restored from its encoded sections, and its entities by number."""
+    entities = decode_entities(sections["entities"])
+    engine = _unpickle_engine(sections["engine"], _decode_external(sections), entities)
+
+    game_map = engine.game_map
+    for entity in game_map.entities:
+        entity.parent = game_map
+
+    return engine, entities
+
+
+def load_sections(sections: Dict[str, bytes]) -> Engine:
+    """Return the Engine restored from its encoded sections."""
+    return _load_sections(sections)[0]
+
+
+def _pack_sections(sections: Dict[str, bytes]) -> bytes:
+    body = io.BytesIO()
+    for name, data in sections.items():
+        encoded_name = name.encode()
+        body.write(_SECTION_HEADER.pack(len(encoded_name), len(data)))
+        body.write(encoded_name)
+        body.write(data)
+    return body.getvalue()
+
+
+def _unpack_sections(data: bytes) -> Dict[str, bytes]:
+    body = memoryview(data)
+    sections = {}
+    offset = 0
+    while offset < len(body):
+        name_length, data_length = _SECTION_HEADER.unpack_from(body, offset)
+        offset += _SECTION_HEADER.size
+        name = bytes(body[offset:offset + name_length]).decode()
+        offset += name_length
+        sections[name] = bytes(body[offset:offset + data_length])
+        offset += data_length
+    return sections
+
+
+def _dumps_sections(sections: Dict[str, bytes], compressor: str, level: int) -> bytes:
+    header = _HEADER.pack(MAGIC, VERSION, COMPRESSORS[compressor], level)
+    return header + _compress(_pack_sections(sections), compressor, level)
+
+
+def _loads_sections(data: bytes) -> Dict[str, bytes]:
+    magic, version, compressor_id, level = _HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unsupported save version {version}.")
+
+    return _unpack_sections(_decompress(data[_HEADER.size:], compressor_id))
+
+
+def dumps(engine: Engine, *, compressor: str = "zlib", level: int = 1) -> bytes:
+    """Return the save data of an Engine.
+
+    `compressor` is one of COMPRESSORS, `level` its compression level.
+    """
+    return _dumps_sections(dump_sections(engine), compressor, level)
+
+
+def loads(data: bytes) -> Engine:
+    """Return the Engine stored in save data.
+
+    Raises ValueError for data in the older pickle format, or of another version.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("Incompatible save, it was written by an older version of the game.")
+
+    return load_sections(_loads_sections(data))
+
+
+def save(engine: Engine, filename: str, *, compressor: str = "zlib", level: int = 1) -> None:
+    """Save an Engine to a file.  A full save replaces any delta log of the file."""
+    data = dumps(engine, compressor=compressor, level=level)
+    with open(filename, "wb") as f:
+        f.write(data)
+
+    if os.path.exists(filename + DELTA_SUFFIX):
+        os.remove(filename + DELTA_SUFFIX)
+
+
+def load(filename: str) -> Engine:
+    """Load an Engine from a file, applying the deltas logged by an Autosave of it."""
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    if not data.startswith(MAGIC):
+        return loads(data)
+
+    sections = _loads_sections(data)
+    if "token" in sections:
+        deltas = _read_deltas(filename + DELTA_SUFFIX, sections["token"])
+        if deltas:
+            return _apply_deltas(sections, deltas)
+
+    return load_sections(sections)
+
+
+def remove(filename: str) -> None:
+    """Delete a save file, its delta log and its message archive, if they exist."""
+    for path in (filename, filename + DELTA_SUFFIX, filename + MESSAGES_SUFFIX):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _encode_indices(array: np.ndarray) -> bytes:
+    return np.flatnonzero(array).astype(np.uint32).tobytes()
+
+
+def _get_raw_bytes(array: np.ndarray) -> np.ndarray:
+    """Return the memory of a contiguous array as a flat array of bytes, without copying it."""
+    return array.ravel(order="K").view(np.uint8)
+
+
+def _decode_indices(data: bytes, shape: Tuple[int, ...]) -> Tuple[np.ndarray, ...]:
+    return np.unravel_index(np.frombuffer(data, dtype=np.uint32), shape)
+
+
+def _encode_numbers(entities: Iterable[Entity], numbers: Dict[Entity, int]) -> bytes:
+    return np.array([numbers[entity] for entity in entities], dtype=np.uint32).tobytes()
+
+
+def _decode_numbers(data: bytes, entities: List[Entity]) -> List[Entity]:
+    return [entities[number] for number in np.frombuffer(data, dtype=np.uint32).tolist()]
+
+
+def _read_deltas(filename: str, token: bytes) -> List[Dict[str, bytes]]:
+    """Return the delta records of a delta log, if the log belongs to the base with this token."""
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+
+    header_length = len(DELTA_MAGIC) + _TOKEN_LENGTH
+    if data[:header_length] != DELTA_MAGIC + token:
+        return []  # Left over from an older base snapshot.
+
+    deltas = []
+    offset = header_length
+    while offset + _DELTA_RECORD_HEADER.size <= len(data):
+        (record_length,) = _DELTA_RECORD_HEADER.unpack_from(data, offset)
+        offset += _DELTA_RECORD_HEADER.size
+        record = data[offset:offset + record_length]
+        if len(record) < record_length:
+            break  # Cut off by a crash while writing.
+        deltas.append(_unpack_sections(zlib.decompress(record)))
+        offset += record_length
+
+    return deltas
+
+
+def _apply_delta(engine: Engine, entities: List[Entity], delta: Dict[str, bytes]) -> None:
+    """Apply a delta record of Autosave to an Engine, with `entities` by their numbers."""
+    game_map = engine.game_map
+
+    # New entities first, as the records may refer to them.  They are numbered in order.
+    records = pickle.loads(delta["entities"])
+    for number, record in records:
+        if number == len(entities):
+            entities.append(create_entity(record))
+    for number, record in records:
+        apply_record(entities[number], record, entities)
+
+    # Entities which were put back and taken again since the last delta may be missing.
+    for entity in _decode_numbers(delta["removed"], entities):
+        if entity in game_map.entities:
+            game_map.remove_entity(entity)
+    # The added entities go to the end of the map's entities, in the order they were added.
+    for entity in _decode_numbers(delta["added"], entities):
+        if entity in game_map.entities:
+            game_map.remove_entity(entity)
+        entity.parent = game_map
+        game_map.add_entity(entity)
+    for entity in _decode_numbers(delta["indexed"], entities):
+        game_map.relocate_entity(entity)
+
+    # Adding and removing entities changed the scheduler, so it is replaced afterwards.
+    (
+        engine.turn, engine.mouse_location, game_map.transparency_version, rng_state,
+        game_map.scheduler
+    ) = _unpickle_engine(delta["state"], {}, entities)
+    if rng_state is not None:
+        engine.game_world.rng.setstate(rng_state)
+
+    if "tiles" in delta:
+        game_map.tiles[_decode_indices(delta["tiles"], game_map.tiles.shape)] = np.frombuffer(
+            delta["tile_values"], dtype=game_map.tiles.dtype
+        )
+    game_map.explored |= decode_bits(delta["explored"])
+
+    message_log = engine.message_log
+    (replaced,) = struct.unpack("<I", delta["messages_replaced"])
+    for _ in range(replaced):
+        message_log.messages.pop()
+    message_log.messages.extend(decode_messages(delta["messages"]))
+    (message_count,) = struct.unpack("<Q", delta["message_count"])
+    message_log.first_index = message_count - len(message_log.messages)
+
+    if message_log.archive is not None:
+        message_log.archive.restore(struct.unpack("<Q", delta["archived"])[0])
+
+
+def _apply_deltas(base: Dict[str, bytes], deltas: List[Dict[str, bytes]]) -> Engine:
+    """Return the Engine of a base snapshot with its deltas applied in order."""
+    engine, entities = _load_sections(base)
+
+    for delta in deltas:
+        _apply_delta(engine, entities, delta)
+
+    # The visible area is not saved, it is computed again for the last point of view.
+    engine.update_fov()
+    return engine
+
+
+class Autosave:
+    """
+    Saves the game every `interval` turns without re-serializing everything.
+
+    The first checkpoint writes a base snapshot.  Later checkpoints append only what
+    changed since the previous one to the delta log of the snapshot: the records of
+    the entities which changed (see GameMap.take_changes) and of the player, the
+    entities which were added, removed or moved, the turn, the scheduler, the changed
+    tiles, the newly explored tiles and the new messages.  After `compact_after`
+    deltas, or when the player enters a new floor, a new base snapshot replaces the
+    base and its log.
+    """
+
+    def __init__(self, filename: str, *, interval: int = 5, compact_after: int = 100):
+        self.filename = filename
+        self.interval = interval
+        self.compact_after = compact_after
+
+        self._token = b""
+        self._last_turn: Optional[int] = None
+        self._deltas_written = 0
+
+        # What was saved by the last checkpoint.
+        self._game_map: Optional[GameMap] = None
+        # The numbers of the saved entities, which the base snapshot was loaded with.
+        self._numbers: Dict[Entity, int] = {}
+        self._tiles: Optional[np.ndarray] = None
+        self._explored: Optional[np.ndarray] = None
+        self._rng_state: Any = None
+        self._message_count = 0
+
+    def update(self, engine: Engine) -> None:
+        """Write a checkpoint if at least `interval` turns passed since the last one."""
+        if self._last_turn is not None and engine.turn - self._last_turn < self.interval:
+            return
+
+        try:
+            if engine.game_map is not self._game_map or self._deltas_written >= self.compact_after:
+                self.write_base(engine)
+            else:
+                self.write_delta(engine)
+        except OSError:
+            # The delta log may end in a partial record, so the next checkpoint is a base.
+            self._last_turn = engine.turn
+            self._game_map = None
+            raise
+
+    def write_base(self, engine: Engine) -> None:
+        """Write a new base snapshot and start an empty delta log for it."""
+        self._token = os.urandom(_TOKEN_LENGTH)
+
+        sections = dump_sections(engine)
+        sections["token"] = self._token
+        with open(self.filename, "wb") as f:
+            f.write(_dumps_sections(sections, "zlib", 1))
+        with open(self.filename + DELTA_SUFFIX, "wb") as f:
+            f.write(DELTA_MAGIC + self._token)
+
+        engine.game_map.take_changes()
+        self._deltas_written = 0
+        self._numbers = get_entity_numbers(engine.game_map)
+        self._remember(engine)
+
+    def write_delta(self, engine: Engine) -> None:
+        """Append the changes since the last checkpoint to the delta log."""
+        assert self._tiles is not None and self._explored is not None
+
+        game_map = engine.game_map
+        added, indexed, changed = game_map.take_changes()
+        numbers = self._numbers
+
+        # The player changes nearly every turn, so it is always saved.  Entities which
+        # are neither saved yet nor on the map were only there between checkpoints.
+        saved = dict.fromkeys(
+            entity
+            for entity in (engine.player, *changed)
+            if entity in numbers or entity in game_map.entities
+        )
+        for entity in list(saved):
+            if isinstance(entity, Actor):
+                saved.update(dict.fromkeys(entity.inventory.items))
+        for entity in saved:
+            if entity not in numbers:
+                numbers[entity] = len(numbers)
+
+        rng_state = engine.game_world.rng.getstate()
+
+        message_log = engine.message_log
+        new_messages = message_log.total_count - self._message_count
+        # The last saved message may have been stacked on since, so it is saved again.
+        replaced = 1 if self._message_count and new_messages < len(message_log.messages) else 0
+        first_changed_message = max(0, len(message_log.messages) - new_messages - replaced)
+
+        state = io.BytesIO()
+        _EnginePickler(state, numbers).dump((
+            engine.turn,
+            engine.mouse_location,
+            game_map.transparency_version,
+            rng_state if rng_state != self._rng_state else None,
+            game_map.scheduler,
+        ))
+
+        sections = {
+            "entities": pickle.dumps(
+                [(numbers[entity], encode_entity(entity, numbers)) for entity in saved],
+                protocol=pickle.HIGHEST_PROTOCOL,
+            ),
+            "removed": _encode_numbers(
+                (
+                    entity
+                    for entity in changed
+                    if entity in numbers and entity not in game_map.entities
+                ),
+                numbers,
+            ),
+            "added": _encode_numbers(added, numbers),
+            "indexed": _encode_numbers(indexed, numbers),
+            "state": state.getvalue(),
+            "explored": encode_bits(game_map.explored & ~self._explored),
+            "messages_replaced": struct.pack("<I", replaced),
+            "messages": encode_messages(
+                islice(message_log.messages, first_changed_message, None)
+            ),
+            "message_count": struct.pack("<Q", message_log.total_count),
+        }
+        if message_log.archive is not None:
+            sections["archived"] = struct.pack("<Q", len(message_log.archive))
+        # Tiles rarely change after generation, so they are compared in bulk first.
+        if not np.array_equal(_get_raw_bytes(game_map.tiles), _get_raw_bytes(self._tiles)):
+            changed_tiles = game_map.tiles != self._tiles
+            sections["tiles"] = _encode_indices(changed_tiles)
+            sections["tile_values"] = game_map.tiles[changed_tiles].tobytes()
+
+        record = zlib.compress(_pack_sections(sections), 1)
+        with open(self.filename + DELTA_SUFFIX, "ab") as f:
+            f.write(_DELTA_RECORD_HEADER.pack(len(record)))
+            f.write(record)
+
+        self._deltas_written += 1
+        self._remember(engine)
+
+    def _remember(self, engine: Engine) -> None:
+        game_map = engine.game_map
+
+        self._last_turn = engine.turn
+        self._game_map = game_map
+        if self._tiles is None or not np.array_equal(
+                _get_raw_bytes(game_map.tiles), _get_raw_bytes(self._tiles)
+        ):
+            self._tiles = game_map.tiles.copy(order="K")
+        self._explored = game_map.explored.copy()
+        self._rng_state = engine.game_world.rng.getstate()
+        self._message_count = engine.message_log.total_count
@@ -0,0 +1,109 @@
+"""Decide which actors take their turns, and when."""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, Iterator, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+# The speed of an actor which acts once per turn of the player.
+NORMAL_SPEED = 100
+
+# The game time which passes per turn of the player.
+TICKS_PER_TURN = 100
+
+
+def get_delay(actor: Actor) -> int:
+    """Return the game time between two actions of the actor."""
+    return max(1, TICKS_PER_TURN * NORMAL_SPEED // actor.speed)
+
+
+class Scheduler:
+    """
+    A priority queue of the awake actors of a map, by the game time of their next action.
+
+    Actors which act at the same time act in the order they were added.  Dormant
+    actors are not queued at all, so they cost nothing until they are woken again.
+    """
+
+    def __init__(self) -> None:
+        self.time = 0
+        self._queue: List[Tuple[int, int, Actor]] = []
+        # The order the actors were added in, which breaks ties between them.
+        self._order: Dict[Actor, int] = {}
+        self._added_count = 0
+        # The time of the next action of every awake actor.  Queue entries of actors
+        # which were put to sleep or rescheduled since are skipped.
+        self._next_action_times: Dict[Actor, int] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # The queue is rebuilt from the next action times on load, without the skipped entries.
+        del state["_queue"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._queue = [
+            (action_time, self._order[actor], actor)
+            for actor, action_time in self._next_action_times.items()
+        ]
+        heapq.heapify(self._queue)
+
+    def __len__(self) -> int:
+        """Return the number of awake actors."""
+        return len(self._next_action_times)
+
+    def add(self, actor: Actor) -> None:
+        """Add an awake actor, which acts after its delay."""
+        if actor not in self._order:
+            self._order[actor] = self._added_count
+            self._added_count += 1
+        self.wake(actor)
+
+    def remove(self, actor: Actor) -> None:
+        """
+        Forget an actor which died or left the map.  Actors which were never added are ignored.
+
+        Its entry in the queue is skipped when it comes up, no later than its next action.
+        """
+        self._order.pop(actor, None)
+        self._next_action_times.pop(actor, None)
+
+    def wake(self, actor: Actor) -> None:
+        """Queue a dormant actor again.  Actors which were never added are ignored."""
+        if actor in self._next_action_times or actor not in self._order:
+            return
+
+        self._schedule(actor, self.time + get_delay(actor))
+
+    def sleep(self, actor: Actor) -> None:
+        """Take the actor out of the queue until it is woken."""
+        self._next_action_times.pop(actor, None)
+
+    def is_awake(self, actor: Actor) -> bool:
+        return actor in self._next_action_times
+
+    def advance(self) -> Iterator[Actor]:
+        """
+        Let a turn of the player pass, and yield every actor whose action is due.
+
+        Once it was yielded an actor is queued for its next action, unless it was put
+        to sleep or removed in the meantime.
+        """
+        self.time += TICKS_PER_TURN
+
+        while self._queue and self._queue[0][0] <= self.time:
+            action_time, _, actor = heapq.heappop(self._queue)
+            if self._next_action_times.get(actor) != action_time:
+                continue  # Put to sleep, removed or rescheduled since.
+
+            yield actor
+
+            if self._next_action_times.get(actor) == action_time:
+                self._schedule(actor, action_time + get_delay(actor))
+
+    def _schedule(self, actor: Actor, action_time: int) -> None:
+        self._next_action_times[actor] = action_time
+        heapq.heappush(self._queue, (action_time, self._order[actor], actor))
@@ -1,9 +1,6 @@
 """Handle the loading and initialization of game sessions."""
 from __future__ import annotations
 
-import copy
-import lzma
-import pickle
 import traceback
 from typing import Optional
 
@@ -14,14 +11,27 @@ from engine import Engine
 import entity_factories
 from game_map import GameWorld
 import input_handlers
+from message_log import MessageArchive
+import savegame
 
 
 # Load the background image and remove the alpha channel.
 background_image = tcod.image.load("images/menu_background.png")[:, :, :3]
 
 
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
+def new_game(
+    message_archive: Optional[str] = None,
+    pregenerate: bool = True,
+    seed: Optional[int] = None,
+    generator: Optional[str] = None,
+) -> Engine:
+    """Return a brand new game session as an Engine instance.
+
+    Old messages are moved to the file `message_archive` if given, otherwise they are dropped.
+    If `pregenerate` is False then floors are only generated when the player reaches them.
+    The same `seed` always creates the same game, a random one is used if it is None.
+    Every floor is generated by the procgen generator named `generator` if given.
+    """
     map_width = 80
     map_height = 43
 
@@ -29,9 +39,11 @@ def new_game() -> Engine:
     room_min_size = 6
     max_rooms = 30
 
-    player = copy.deepcopy(entity_factories.player)
+    player = entity_factories.player.clone()
 
     engine = Engine(player=player)
+    if message_archive is not None:
+        engine.message_log.archive = MessageArchive(message_archive)
 
     engine.game_world = GameWorld(
         engine=engine,
@@ -39,7 +51,10 @@ def new_game() -> Engine:
         room_min_size=room_min_size,
         room_max_size=room_max_size,
         map_width=map_width,
-        map_height=map_height
+        map_height=map_height,
+        seed=seed,
+        generator=generator,
+        pregenerate=pregenerate
     )
 
     engine.game_world.generate_floor()
@@ -49,8 +64,8 @@ def new_game() -> Engine:
         "Hello and welcome, adventurer, to Caverns of Green Hill!", color.welcome_text
     )
 
-    dagger = copy.deepcopy(entity_factories.dagger)
-    leather_armor = copy.deepcopy(entity_factories.leather_armor)
+    dagger = entity_factories.dagger.clone()
+    leather_armor = entity_factories.leather_armor.clone()
 
     dagger.parent = player.inventory
     leather_armor.parent = player.inventory
@@ -66,8 +81,7 @@ def new_game() -> Engine:
 
 def load_game(filename: str) -> Engine:
     """Load an Engine instance from a file."""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    engine = savegame.load(filename)
     assert isinstance(engine, Engine)
     return engine
 
@@ -75,6 +89,10 @@ def load_game(filename: str) -> Engine:
 class MainMenu(input_handlers.BaseEventHandler):
     """Handle the main menu rendering and input."""
 
+    def __init__(self, generator: Optional[str] = None):
+        # Passed on to new_game.
+        self.generator = generator
+
     def on_render(self, console: tcod.Console) -> None:
         """Render the main menu on a background image."""
         console.draw_semigraphics(background_image, 0, 0)
@@ -122,6 +140,11 @@ class MainMenu(input_handlers.BaseEventHandler):
                 traceback.print_exc()  # Print to stderr.
                 return input_handlers.PopupMessage(self, f"Failed to load save:\n{exc}")
         elif event.sym == tcod.event.K_n:
-            return input_handlers.MainGameEventHandler(new_game())
+            return input_handlers.MainGameEventHandler(
+                new_game(
+                    message_archive="savegame.sav" + savegame.MESSAGES_SUFFIX,
+                    generator=self.generator,
+                )
+            )
 
         return None